@@ -0,0 +1,68 @@
+"""Time the writing of a batch of reports (one per country of the logs).
+
+Run from the root of the repository with
+``python benchmarks/<script>.py [pdf|html]`` (requires PDF Reports). The
+``html`` mode only renders the templates and figures, for environments
+without a PDF engine. The reports are written one by one with
+``pdf_reports``, then with ``WebLogs.write_reports`` in one process, then in
+a pool of processes.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from pdf_reports import pug_to_html, write_report
+from lala import WebLogs
+
+FORMAT = sys.argv[1] if len(sys.argv) > 1 else 'pdf'
+TEMPLATE = """
+h1 Hits from {{ country }}
+p {{ weblogs.index.size }} hits out of {{ total_hits }}
+p {{ weblogs.IP.nunique() }} visitors
+- var figure = weblogs.plot_timeline(bins_per_day=4)
+img(src="{{ pdf_tools.figure_data(figure, (12, 2)) }}")
+- var piechart = weblogs.plot_piechart('method')
+img(src="{{ pdf_tools.figure_data(piechart[0]) }}")
+{{ pdf_tools.dataframe_to_html(weblogs.url.value_counts()[:10].to_frame()) }}
+"""
+
+weblogs, _ = WebLogs.from_nginx_weblogs(os.path.join('examples', 'data',
+                                                     'example_logs.txt'))
+countries = weblogs.country_name.value_counts()
+countries = list(countries[countries >= 10].index)
+directory = tempfile.mkdtemp()
+reports = [
+    dict(target=os.path.join(directory, 'report_%d.%s' % (i, FORMAT)),
+         filters=dict(country_name=country), context=dict(country=country))
+    for i, country in enumerate(countries)
+]
+print("%d reports (%s)" % (len(reports), FORMAT))
+# Warm-up (imports, fonts...)
+weblogs.write_reports(reports[:1], template_string=TEMPLATE, n_jobs=1,
+                      shared_aggregations=dict(total_hits=len), logger=None)
+
+t0 = time.time()
+for report in reports:
+    entries = weblogs[weblogs.country_name == report['context']['country']]
+    html = pug_to_html(string=TEMPLATE, weblogs=entries,
+                       total_hits=len(weblogs), **report['context'])
+    if FORMAT == 'pdf':
+        write_report(html, target=report['target'])
+    else:
+        with open(report['target'], 'w') as f:
+            f.write(html)
+    plt.close('all')
+print("one by one with pdf_reports: %.2fs" % (time.time() - t0))
+
+for n_jobs in [1, None]:
+    t0 = time.time()
+    errors = weblogs.write_reports(reports, template_string=TEMPLATE,
+                                   shared_aggregations=dict(total_hits=len),
+                                   n_jobs=n_jobs, logger=None)
+    assert errors == {}
+    print("write_reports, n_jobs=%s: %.2fs" % (n_jobs, time.time() - t0))
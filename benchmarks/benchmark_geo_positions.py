@@ -0,0 +1,36 @@
+"""Time the map of the positions of 1M hits from 200k distinct positions.
+
+Run from the root of the repository with ``python benchmarks/<script>.py``
+(requires Cartopy). The drawing time depends on ``max_points`` (or on the
+resolution of the hexbin mode), not on the number of distinct positions.
+"""
+
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+from lala import WebLogs
+
+N_HITS = 1000000
+N_POSITIONS = 200000
+
+rng = np.random.RandomState(0)
+positions = rng.randint(0, N_POSITIONS, size=N_HITS)
+longitudes = rng.uniform(-150, 60, size=N_POSITIONS)
+latitudes = rng.uniform(-25, 60, size=N_POSITIONS)
+weblogs = WebLogs({
+    'longitude': longitudes[positions],
+    'latitude': latitudes[positions],
+})
+
+for label, parameters in [
+        ('top 1000 positions', dict(max_points=1000)),
+        ('1-degree grid, top 1000 cells', dict(resolution=1, max_points=1000)),
+        ('hexbin, 2 degrees', dict(hexbin=True, resolution=2))]:
+    t0 = time.time()
+    ax = weblogs.plot_geo_positions(country_colors=False, **parameters)
+    ax.figure.canvas.draw()
+    plt.close(ax.figure)
+    print("%s: %.2fs" % (label, time.time() - t0))
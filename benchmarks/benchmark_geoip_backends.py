@@ -0,0 +1,26 @@
+"""Compare the geolocation backends on random IPv4 addresses.
+
+Run from the root of the repository with ``python benchmarks/<script>.py``.
+The GeoLite City database must be present at ``conf['geolite_path']``.
+"""
+
+import time
+
+import numpy as np
+from lala.conf import conf
+from lala.geolocation import create_geoip_backend
+
+N_IPS = 200000
+
+rng = np.random.RandomState(0)
+ips = ['%d.%d.%d.%d' % tuple(octets)
+       for octets in rng.randint(0, 256, size=(N_IPS, 4))]
+
+for backend in ['standard', 'mmap', 'memory', 'range_table']:
+    t0 = time.time()
+    geoip = create_geoip_backend(conf['geolite_path'], backend)
+    t1 = time.time()
+    records = geoip.records_by_addrs(ips)
+    t2 = time.time()
+    print("%-12s  init: %.2fs, %d lookups: %.2fs (%d IPs/s)" % (
+        backend, t1 - t0, N_IPS, t2 - t1, N_IPS / (t2 - t1)))
@@ -0,0 +1,44 @@
+"""Measure the time of ``import lala`` and check that it does no I/O.
+
+Run from the root of the repository with ``python benchmarks/<script>.py``.
+Each import is timed in a fresh Python process. An audit hook records the
+network connections and the opened files which are not Python modules.
+"""
+
+import subprocess
+import sys
+
+N_RUNS = 5
+
+IMPORT_CODE = """
+import sys, time
+events = []
+def audit(event, args):
+    if event in ('socket.connect', 'socket.getaddrinfo', 'urllib.Request'):
+        events.append((event, str(args[0])))
+    elif (event == 'open' and isinstance(args[0], str) and
+          not args[0].endswith(('.py', '.pyc', '.so', '.zip', 'METADATA'))):
+        events.append((event, args[0]))
+sys.addaudithook(audit)
+t0 = time.time()
+import lala
+duration = time.time() - t0
+heavy_modules = [m for m in ('cartopy', 'pdf_reports', 'matplotlib.pyplot')
+                 if m in sys.modules]
+print(duration, len(events), heavy_modules)
+for event in events:
+    print(*event, file=sys.stderr)
+"""
+
+durations = []
+for i in range(N_RUNS):
+    process = subprocess.run([sys.executable, '-c', IMPORT_CODE],
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                             universal_newlines=True, check=True)
+    duration, n_events, heavy_modules = process.stdout.split(' ', 2)
+    durations.append(float(duration))
+print("import lala: %.3fs (best of %d runs)" % (min(durations), N_RUNS))
+print("Heavy modules imported: %s" % heavy_modules.strip())
+print("Network and non-Python file accesses: %s" % n_events)
+if process.stderr.strip():
+    print(process.stderr)
@@ -0,0 +1,53 @@
+"""Time the ranking of the most frequent visitors among 1M+ visitors.
+
+Run from the root of the repository with ``python benchmarks/<script>.py``.
+The top visitors are checked against a full Python sort of all the scores.
+"""
+
+import time
+
+import numpy as np
+import pandas
+from lala import WebLogs
+
+N_HITS = 3000000
+N_VISITORS = 1200000
+N_TOP = 20
+
+rng = np.random.RandomState(0)
+ips = np.array(['%d.%d.%d.%d' % tuple(octets)
+                for octets in rng.randint(0, 256, size=(N_VISITORS, 4))],
+               dtype=object)
+seconds = np.sort(rng.randint(0, 30 * 24 * 3600, size=N_HITS))
+weblogs = WebLogs({
+    'IP': ips[rng.randint(0, N_VISITORS, size=N_HITS)],
+    'parsed_date': pandas.to_datetime(seconds, unit='s', utc=True)
+})
+n_visitors = weblogs.IP.nunique()
+
+t0 = time.time()
+sessions = weblogs.sessions()
+t1 = time.time()
+print("sessions of %d visitors (%d hits): %.2fs" % (
+    n_visitors, N_HITS, t1 - t0))
+
+t0 = time.time()
+top = weblogs.most_frequent_visitors(['n_visits', 'time_spent'],
+                                     n_visitors=N_TOP)
+t1 = time.time()
+print("top %d, both criteria at once: %.2fs" % (N_TOP, t1 - t0))
+
+t0 = time.time()
+for criterion in ['n_visits', 'time_spent']:
+    weblogs.most_frequent_visitors(criterion, n_visitors=N_TOP)
+t1 = time.time()
+print("top %d, one criterion at a time: %.2fs" % (N_TOP, t1 - t0))
+
+visitors_durations = sessions.groupby('visitor').duration.sum() / 60.0
+t0 = time.time()
+full_sort = sorted(zip(visitors_durations.values,
+                       visitors_durations.index))[::-1][:N_TOP]
+t1 = time.time()
+print("full Python sort of the (precomputed) time_spent scores: %.2fs" % (
+    t1 - t0))
+assert full_sort == top['time_spent']
@@ -0,0 +1,58 @@
+"""Compare the vectorized NGINX log parser with the former per-line parser.
+
+Run from the root of the repository with ``python benchmarks/<script>.py``.
+"""
+
+import os
+import re
+import time
+from datetime import datetime
+
+import pandas
+from lala.parsing import parse_nginx_log_lines
+
+logs_path = os.path.join('tests', 'data', 'test_logs.txt')
+N_LINES = 500000
+
+
+def per_line_parsing(log_lines):
+    """Former implementation: one regex match and one strptime per line."""
+    regexpr = re.compile(
+        r'(.*) -(.*) - \[(.*)\] "(.*)" (\d+) (\d+) "(.*)" "(.*)"')
+    fields = ('IP', 'stuff', 'date', 'request', 'response', 'status',
+              'referrer', 'browser')
+    errored_lines = []
+    records = []
+    for i, line in enumerate(log_lines):
+        match = re.match(regexpr, line)
+        if match is None:
+            errored_lines.append(i)
+        else:
+            records.append(dict(zip(fields, match.groups())))
+    weblogs = pandas.DataFrame.from_records(records)
+    weblogs['parsed_date'] = [
+        datetime.strptime(s, '%d/%b/%Y:%H:%M:%S %z')
+        for s in weblogs['date']
+    ]
+    weblogs['timestamp'] = [x.timestamp() for x in weblogs['parsed_date']]
+    methods, urls, https = zip(*[
+        request.split() if len(request.split()) == 3 else (None, None, None)
+        for request in weblogs.request
+    ])
+    for name, data in [('method', methods), ('url', urls), ('http', https)]:
+        weblogs[name] = data
+    return weblogs, errored_lines
+
+
+with open(logs_path, 'r') as f:
+    sample_lines = f.read().split("\n")
+log_lines = (sample_lines * (N_LINES // len(sample_lines) + 1))[:N_LINES]
+
+for name, parser in [('per-line', per_line_parsing),
+                     ('vectorized', parse_nginx_log_lines)]:
+    t0 = time.time()
+    weblogs, errored_lines = parser(log_lines)
+    duration = time.time() - t0
+    print("%-10s  %d lines in %.2fs (%d lines/s), %d errored lines" % (
+        name, len(log_lines), duration, len(log_lines) / duration,
+        len(errored_lines)))
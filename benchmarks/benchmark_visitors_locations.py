@@ -0,0 +1,61 @@
+"""Time the locations of 1M visitors, against the former per-IP groupby.
+
+Run from the root of the repository with ``python benchmarks/<script>.py``.
+The former implementation (one ``groupby`` group and two ``iloc`` per IP) is
+timed on a sample of the visitors only, and its results are compared to the
+new implementation's on that sample.
+"""
+
+import time
+
+import numpy as np
+from lala import WebLogs
+
+N_HITS = 2000000
+N_VISITORS = 1000000
+N_SAMPLE_VISITORS = 20000
+
+rng = np.random.RandomState(0)
+ips = np.array(['%d.%d.%d.%d' % tuple(octets)
+                for octets in rng.randint(0, 256, size=(N_VISITORS, 4))],
+               dtype=object)
+cities = np.array(['Edinburgh', 'Paris', 'Lima', np.nan], dtype=object)
+countries = np.array(['United Kingdom', 'France', 'Peru', np.nan],
+                     dtype=object)
+visitors = rng.randint(0, N_VISITORS, size=N_HITS)
+places = rng.randint(0, 4, size=N_HITS)
+weblogs = WebLogs({
+    'IP': ips[visitors],
+    'city': cities[places],
+    'country_name': countries[places],
+})
+
+
+def former_visitors_locations(weblogs):
+    return {
+        ip: " ".join([
+            df.iloc[0].city if isinstance(df.iloc[0].city, str) else "",
+            (df.iloc[0].country_name
+             if isinstance(df.iloc[0].country_name, str) else "")
+        ])
+        for ip, df in weblogs.groupby('IP', observed=True)
+    }
+
+
+for compact in (False, True):
+    if compact:
+        weblogs = weblogs.compact()
+    t0 = time.time()
+    locations = weblogs.visitors_locations()
+    t1 = time.time()
+    print("visitors_locations of %d visitors%s: %.2fs" % (
+        len(locations), " (compact)" if compact else "", t1 - t0))
+
+sample = weblogs[weblogs.IP.isin(ips[:N_SAMPLE_VISITORS])]
+t0 = time.time()
+former_locations = former_visitors_locations(sample)
+t1 = time.time()
+print("former visitors_locations of %d visitors: %.2fs (%.0fs for %d)" % (
+    len(former_locations), t1 - t0,
+    (t1 - t0) * len(locations) / len(former_locations), len(locations)))
+assert former_locations == sample.visitors_locations()
@@ -1,66 +1,45 @@
-from datetime import datetime
+from collections import OrderedDict, namedtuple
+from functools import lru_cache, partial, wraps
+import inspect
 
+import os
 import re
 import time
-import subprocess as sp
-import urllib
-import os
-import gzip
-from io import BytesIO
 import socket
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
-import pygeoip
 import pandas
-import proglog
-from pdf_reports import pug_to_html, write_report
 
-from .conf import conf
+from .domains import resolve_domains, DomainsCache
+from .geolocation import GEO_FIELDS, geolocate_ips, geoip_cache, get_geoip
+from .ips import IPRanges
+from .maps import CARTOPY_INSTALLED, init_map, get_countries_geometries
+from . import plots
+from .remote import (get_remote_file_content, iter_remote_file_lines,
+                     multiplexed_ssh_transport)
+from .parsing import (parse_nginx_log_lines, iter_file_lines, iter_chunks,
+                      open_log_file, find_log_files, dates_to_timestamps,
+                      weblogs_timestamps, to_utc)
+from .reports import report_to_html, write_reports
+from .rollups import RollupCube, DEFAULT_DIMENSIONS
+from .schema import compact_dataframe, memory_usage_report
+from .store import read_store, write_store
 
 import numpy as np
-from matplotlib import cm
-import matplotlib.pyplot as plt
-from matplotlib.ticker import MaxNLocator
-
-try:
-    import cartopy
-    import cartopy.io.shapereader as shpreader
-    import cartopy.crs as ccrs
-    shpfilename = shpreader.natural_earth(resolution='110m',
-                                          category='cultural',
-                                          name='admin_0_countries')
-    reader = shpreader.Reader(shpfilename)
-    countries = list(reader.records())
-    name_to_geometry = {
-        country.attributes[e]: country.geometry
-        for country in countries
-        for e in ('ADM0_A3', 'BRK_NAME')
-    }
-    name_to_extent = {
-        name: geometry.bounds
-        for name, geometry in name_to_geometry.items()
-    }
-    CARTOPY_INSTALLED = True
-
-except ImportError:
-    name_to_geometry = None
-    name_to_extent = None
-    cartopy = None
-    ccrs = None
-    CARTOPY_INSTALLED = False
-
-
-if not os.path.exists(conf['geolite_path']):
-    response = urllib.request.urlopen(conf['geolite_url'])
-    geolite_gz = response.read()
-    geolite_bites = BytesIO(geolite_gz)
-    with gzip.open(geolite_bites, 'rb') as f:
-        geolite_content = f.read()
-    if not os.path.exists(conf['data_dir']):
-        os.makedirs(conf['data_dir'])
-    with open(conf['geolite_path'], 'wb') as f:
-        f.write(geolite_content)
-
-geoip = pygeoip.GeoIP(conf['geolite_path'])
+
+
+def __getattr__(name):
+    """Give access to ``name_to_geometry`` and ``name_to_extent``, which were
+    computed when this module was imported, and are now only loaded on
+    first access (None if Cartopy is not installed)."""
+    if name in ('name_to_geometry', 'name_to_extent'):
+        if not CARTOPY_INSTALLED:
+            return None
+        name_to_geometry, name_to_extent = get_countries_geometries()
+        return dict(name_to_geometry=name_to_geometry,
+                    name_to_extent=name_to_extent)[name]
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
 
 durations = {
     'second': 1,
@@ -82,58 +61,185 @@ def time_of_last(num, duration):
     """
     return time.time() - num * durations[duration]
 
-def get_remote_file_content(filename='/var/log/nginx/access.log',
-                            host='localhost', user='root', decode='utf8',
-                            target=None):
-    """
-    Parameters
-    ----------
-
-    filename
-      path to the file in the host machine
-
-    host
-      IP address or domain name of the host.
 
-    user
-      Username on the host.
+def _sessions_boundaries(visitors, timestamps, max_interval):
+    """Return the indices of the first and last hits of each session.
 
-    decode
-      If not None, the file content received from the server will be
-      decoded into a string using this format.
+    The hits must be sorted by visitor then time. A new session starts at
+    each new visitor, or when the time since the previous hit of the
+    visitor is ``max_interval`` seconds or more.
+    """
+    new_session = np.ones(len(visitors), dtype=bool)
+    new_session[1:] = ((visitors[1:] != visitors[:-1]) |
+                       (np.diff(timestamps) >= max_interval))
+    starts = new_session.nonzero()[0]
+    ends = np.append(starts[1:], len(visitors))[:len(starts)] - 1
+    return starts, ends
+
+
+def _trie_pattern(trie):
+    """Return a regex pattern matching the words of a trie (nested dicts
+    ``{character: subtrie}`` where ``''`` marks the end of a word)."""
+    alternatives = [
+        re.escape(character) + _trie_pattern(subtrie)
+        for character, subtrie in sorted(trie.items())
+        if character != ''
+    ]
+    if len(alternatives) == 0:
+        return ''
+    if len(alternatives) == 1:
+        pattern = alternatives[0]
+    else:
+        pattern = '(?:%s)' % '|'.join(alternatives)
+    if '' in trie:
+        pattern = '(?:%s)?' % pattern
+    return pattern
+
+
+@lru_cache(maxsize=32)
+def _terms_regexpr(terms):
+    """Return a compiled regex matching any of the terms (a tuple).
+
+    The terms are arranged in a trie so that the terms with a common prefix
+    share the same branch of the regex, and the regex engine does not try
+    every term at every position of the searched texts.
+    """
+    if len(terms) == 0:
+        return re.compile(r'(?!)')  # never matches
+    trie = {}
+    for term in terms:
+        node = trie
+        for character in term:
+            node = node.setdefault(character, {})
+        node[''] = {}
+    return re.compile(_trie_pattern(trie))
+
+
+def _top_scores(scores, labels, n):
+    """Return the list of the ``n`` ``(score, label)`` with highest scores.
+
+    The labels must be sorted. The result is sorted by decreasing score then
+    decreasing label. Only the elements scoring at least as high as the n-th
+    best score (found with a partial sort) are fully sorted.
     """
-    proc = sp.Popen(['ssh', '%s@%s' % (user, host), 'cat %s' % filename],
-                    stderr=sp.PIPE, stdout=sp.PIPE)
-    out, err = proc.communicate()
-    if len(err):
-        raise IOError(err)
-    if decode is not None:
-        out = out.decode(decode)
-    if target is not None:
-        with open(target, "w") as f:
-            f.write(out)
-    return out
-
-def init_map(figsize=(12, 8),  extent=(-150, 60, -25, 60)):
-    """Initialize a world map with the given dimensions.
-
-    ``figsize`` is the figure's size in inches. ``extent`` is the boundaries
-    of the map, in its own PlateCarree coordinates.
+    n = min(n, len(scores))
+    if n == 0:
+        return []
+    if n < len(scores):
+        threshold = np.partition(scores, len(scores) - n)[len(scores) - n]
+        candidates = (scores >= threshold).nonzero()[0]
+    else:
+        candidates = np.arange(len(scores))
+    order = np.lexsort((candidates, scores[candidates]))[::-1][:n]
+    selected = candidates[order]
+    return list(zip(scores[selected].tolist(), labels[selected].tolist()))
+
+
+def _strings_or_empty(values):
+    """Return an object array of the values, with "" for non-strings."""
+    codes, uniques = pandas.factorize(values)
+    # Missing values (code -1) take the last ("") element
+    strings = np.array([u if isinstance(u, str) else "" for u in uniques] +
+                       [""], dtype=object)
+    return strings[codes]
+
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'currsize'])
+
+
+def _hashable(value):
+    """Return a hashable version of an argument (lists become tuples...)."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _hashable(v)) for k, v in value.items()))
+    if isinstance(value, set):
+        return frozenset(value)
+    return value
+
+
+def memoized(method):
+    """Decorate a WebLogs method so its results are cached in the instance.
+
+    The results are cached per arguments (with the defaults filled in, so
+    ``f()`` and ``f(n=10)`` share the same result if 10 is the default), and
+    forgotten when the weblogs change (see ``WebLogs.clear_cache``). Calls
+    with unhashable arguments are not cached.
     """
-    if not CARTOPY_INSTALLED:
-        raise ImportError('This feature requires Cartopy installed.')
-    ax = plt.axes(projection=cartopy.crs.PlateCarree())
-    ax.add_feature(cartopy.feature.LAND)
-    ax.add_feature(cartopy.feature.OCEAN)
-    ax.add_feature(cartopy.feature.COASTLINE)
-    ax.add_feature(cartopy.feature.BORDERS, linestyle='-', alpha=.5)
-
-    ax.set_extent(extent)
-    ax.figure.set_size_inches(figsize)
-    return ax
+    signature = inspect.signature(method)
+
+    @wraps(method)
+    def memoized_method(self, *args, **kwargs):
+        arguments = signature.bind(self, *args, **kwargs)
+        arguments.apply_defaults()
+        arguments = list(arguments.arguments.items())[1:]
+        key = (method.__name__, _hashable(arguments))
+        try:
+            hash(key)
+        except TypeError:
+            return method(self, *args, **kwargs)
+        memo = self._memo()
+        if key in memo['results']:
+            memo['hits'] += 1
+            return memo['results'][key]
+        memo['misses'] += 1
+        result = memo['results'][key] = method(self, *args, **kwargs)
+        return result
+
+    return memoized_method
+
+
+class _ModifyingIndexer:
+    """Wrapper of an indexer (``loc``, ``iloc``...) of weblogs, which marks
+    the weblogs as modified after each assignment."""
+
+    def __init__(self, indexer, weblogs):
+        self._indexer = indexer
+        self._weblogs = weblogs
+
+    def __getattr__(self, name):
+        return getattr(self._indexer, name)
+
+    def __call__(self, *args, **kwargs):
+        return _ModifyingIndexer(self._indexer(*args, **kwargs),
+                                 self._weblogs)
+
+    def __getitem__(self, key):
+        return self._indexer[key]
+
+    def __setitem__(self, key, value):
+        self._indexer[key] = value
+        self._weblogs._modified()
+
+
+def _modifying_method(method):
+    """Decorate a DataFrame method so that it marks the weblogs as modified
+    when it is called with ``inplace=True``."""
+    @wraps(method)
+    def modifying_method(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        if kwargs.get('inplace', False):
+            self._modified()
+        return result
+    return modifying_method
+
 
 class WebLogs(pandas.DataFrame):
-    "Custom Pandas dataframe class for reading web logs."
+    """Custom Pandas dataframe class for reading web logs.
+
+    The aggregations (``sessions``, ``visitors_locations``, the counts
+    plotted by ``plot_piechart``...) are cached in the instance, so calling
+    them again with the same arguments (e.g. several times in a report
+    template) is free. The cached results are shared between the calls, and
+    should not be modified. The figures are not cached: each call of a
+    plotting method draws a new figure (from the cached counts). The cache is
+    not transmitted to the weblogs derived from self (filtered, copied...),
+    and is emptied when self is modified (see ``clear_cache``).
+    """
+    # Internal names are not transmitted to new dataframes (unlike _metadata)
+    _internal_names = pandas.DataFrame._internal_names + ['_memo_cache']
+    _internal_names_set = set(_internal_names)
+
     def __init__(self, *args, **kw):
         super(WebLogs, self).__init__(*args, **kw)
 
@@ -141,71 +247,460 @@ class WebLogs(pandas.DataFrame):
     def _constructor(self):
         return WebLogs
 
+    def __setitem__(self, key, value):
+        super(WebLogs, self).__setitem__(key, value)
+        self._modified()
+
+    def __delitem__(self, key):
+        super(WebLogs, self).__delitem__(key)
+        self._modified()
+
+    # The assignments through the indexers, and the methods called with
+    # inplace=True, modify self
+
+    @property
+    def loc(self):
+        return _ModifyingIndexer(super(WebLogs, self).loc, self)
+
+    @property
+    def iloc(self):
+        return _ModifyingIndexer(super(WebLogs, self).iloc, self)
+
+    @property
+    def at(self):
+        return _ModifyingIndexer(super(WebLogs, self).at, self)
+
+    @property
+    def iat(self):
+        return _ModifyingIndexer(super(WebLogs, self).iat, self)
+
+    bfill = _modifying_method(pandas.DataFrame.bfill)
+    clip = _modifying_method(pandas.DataFrame.clip)
+    drop = _modifying_method(pandas.DataFrame.drop)
+    drop_duplicates = _modifying_method(pandas.DataFrame.drop_duplicates)
+    dropna = _modifying_method(pandas.DataFrame.dropna)
+    eval = _modifying_method(pandas.DataFrame.eval)
+    ffill = _modifying_method(pandas.DataFrame.ffill)
+    fillna = _modifying_method(pandas.DataFrame.fillna)
+    interpolate = _modifying_method(pandas.DataFrame.interpolate)
+    mask = _modifying_method(pandas.DataFrame.mask)
+    query = _modifying_method(pandas.DataFrame.query)
+    rename = _modifying_method(pandas.DataFrame.rename)
+    replace = _modifying_method(pandas.DataFrame.replace)
+    reset_index = _modifying_method(pandas.DataFrame.reset_index)
+    set_index = _modifying_method(pandas.DataFrame.set_index)
+    sort_index = _modifying_method(pandas.DataFrame.sort_index)
+    sort_values = _modifying_method(pandas.DataFrame.sort_values)
+    where = _modifying_method(pandas.DataFrame.where)
+
+    def _modified(self):
+        """Increment the version of self, which empties the cache."""
+        memo = getattr(self, '_memo_cache', None)
+        if memo is not None:
+            memo['version'] += 1
+            memo['results'] = {}
+
+    def _memo(self):
+        """Return the dict of the cached results and counters of self.
+
+        The results are those of the current version of self (see
+        ``_modified``), and are also emptied when the columns or the shape of
+        self have changed since they were computed.
+        """
+        memo = getattr(self, '_memo_cache', None)
+        if memo is None:
+            memo = self._memo_cache = dict(hits=0, misses=0, version=0,
+                                           results={}, fingerprint=None)
+        fingerprint = (memo['version'], tuple(self.columns), self.shape)
+        if memo['fingerprint'] != fingerprint:
+            memo['results'] = {}
+            memo['fingerprint'] = fingerprint
+        return memo
+
+    def cache_info(self):
+        """Return the ``(hits, misses, currsize)`` of the cache of self.
+
+        ``hits`` and ``misses`` count the calls of the cached methods which
+        were (or were not) answered from the cache, and ``currsize`` is the
+        number of cached results.
+        """
+        memo = self._memo()
+        return CacheInfo(memo['hits'], memo['misses'], len(memo['results']))
+
+    def clear_cache(self):
+        """Forget the cached results of self.
+
+        This is done automatically when self is modified by assigning
+        columns (``weblogs[column] = ...``), by assignments through ``loc``,
+        ``iloc``, ``at`` and ``iat``, and by the methods modifying self
+        (``update``, ``insert``, ``pop``, and the methods called with
+        ``inplace=True``). It must be done manually after other
+        modifications, e.g. of the arrays of the columns
+        (``weblogs.IP.values[0] = ...``) or of a column through chained
+        indexing (``weblogs.IP.iloc[0] = ...``).
+        """
+        self._modified()
+
     @staticmethod
-    def from_nginx_weblogs(filepath=None, log_lines=None):
+    def from_nginx_weblogs(filepath=None, log_lines=None, geolocation=True,
+                           compact=False, time_index=False):
         """Return a dataframe of access log entries, from lines of NGINX logs.
 
         The log_lines are a list of strings, each representing one access
-        logged by NGINX.
+        logged by NGINX. Alternatively, ``filepath`` is the path to a log
+        file, which can be compressed (gzip, bz2, xz).
+
+        If ``geolocation`` is True, the geolocation columns are added with
+        ``add_geolocation``. If ``compact`` is True, the weblogs use the
+        compact schema (see ``WebLogs.compact``). If ``time_index`` is True,
+        the weblogs are sorted and indexed by time (see
+        ``WebLogs.with_time_index``).
         """
         if log_lines is None:
-            with open(filepath, 'r') as f:
+            with open_log_file(filepath) as f:
                 log_lines = f.read().split("\n")
-        regexpr = r'(.*) -(.*) - \[(.*)\] "(.*)" (\d+) (\d+) "(.*)" "(.*)"'
-        regexpr = re.compile(regexpr)
-        errored_lines = []
-        records = []
-        for i, line in enumerate(log_lines):
-            match = re.match(regexpr, line)
-            fields = ('IP', 'stuff', 'date', 'request', 'response', 'status',
-                      'referrer', 'browser')
-            if match is None:
-                errored_lines.append(i)
-            else:
-                records.append(dict(zip(fields, match.groups())))
-        weblogs = WebLogs.from_records(records)
-        weblogs['parsed_date'] = [
-            datetime.strptime(s, '%d/%b/%Y:%H:%M:%S %z')
-            for s in weblogs['date']
-        ]
-        weblogs['timestamp'] = [x.timestamp()
-                                for x in weblogs['parsed_date']]
-        fields = ['country_name', 'city', 'country_code3', 'latitude',
-                  'longitude']
-        d = {f: [] for f in fields}
-        for ip in weblogs.IP:
-            rec = geoip.record_by_addr(ip)
-            if rec is None:
-                rec = {field: None for field in fields}
-            for field in fields:
-                d[field].append(rec[field])
-        for field in fields:
-            weblogs[field] = d[field]
-
-        methods, urls, https = zip(*[
-            request.split()
-            if len(request.split()) == 3
-            else (None, None, None)
-            for request in weblogs.request
-        ])
-        for name, data in [('method', methods),
-                           ('url', urls),
-                           ('http', https)]:
-            weblogs[name] = data
+        weblogs, errored_lines = parse_nginx_log_lines(log_lines)
+        weblogs = WebLogs(weblogs)
+        if geolocation:
+            weblogs.add_geolocation()
+        if compact:
+            weblogs = weblogs.compact()
+        if time_index:
+            weblogs = weblogs.with_time_index()
+        return weblogs, errored_lines
 
+    @staticmethod
+    def from_nginx_weblogs_files(path, n_jobs=None, compact=False,
+                                 time_index=False, geolocation=True):
+        """Return a dataframe of the access log entries of several log files.
+
+        Parameters
+        ----------
+
+        path
+          A directory, a glob pattern (e.g. ``/var/log/nginx/access.log*``) or
+          a single file. The files can be compressed (gzip, bz2, xz).
+
+        n_jobs
+          Number of processes parsing the files in parallel. Defaults to the
+          number of CPUs. With ``n_jobs=1`` the files are parsed one after the
+          other in the current process.
+
+        compact
+          If True, the weblogs use the compact schema (see
+          ``WebLogs.compact``).
+
+        time_index
+          If True, the weblogs are indexed by time (see
+          ``WebLogs.with_time_index``).
+
+        geolocation
+          If True, the geolocation columns are added (see
+          ``add_geolocation``) once all the files are parsed, so that the
+          GeoIP database is opened once and each distinct IP is looked up
+          once, in the current process.
+
+        Returns ``(weblogs, errored_lines)`` where the entries of all files are
+        ordered by time, and ``errored_lines`` is a dict
+        ``{filepath: errored_lines_of_that_file}``.
+        """
+        filepaths = find_log_files(path)
+        parse_file = partial(WebLogs.from_nginx_weblogs, geolocation=False)
+        if n_jobs == 1 or len(filepaths) < 2:
+            results = [parse_file(f) for f in filepaths]
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                results = list(executor.map(parse_file, filepaths))
+        errored_lines = {
+            filepath: errors
+            for filepath, (_, errors) in zip(filepaths, results)
+        }
+        if len(results) == 0:
+            results = [parse_file(log_lines=[])]
+        weblogs = pandas.concat([w for (w, _) in results], ignore_index=True)
+        weblogs = weblogs.sort_values('parsed_date', kind='mergesort')
+        weblogs = WebLogs(weblogs.reset_index(drop=True))
+        if geolocation and len(weblogs):
+            weblogs.add_geolocation()
+        if compact:
+            weblogs = weblogs.compact()
+        if time_index:
+            weblogs = weblogs.with_time_index()
+        return weblogs, errored_lines
+
+    @staticmethod
+    def iter_nginx_weblogs(filepath=None, log_lines=None, chunksize=100000,
+                           geolocation=True):
+        """Iterate over successive chunks of the access log entries.
+
+        Yields ``(weblogs, errored_lines)`` pairs, as returned by
+        ``from_nginx_weblogs``, for chunks of ``chunksize`` log lines, so that
+        large logs can be processed with a bounded memory. The file (or the
+        ``log_lines`` iterable) is read progressively. The errored lines
+        and the index of the weblogs are global, i.e. they are the same as
+        when the whole log is loaded at once.
+        """
+        if log_lines is None:
+            with open_log_file(filepath) as f:
+                yield from WebLogs.iter_nginx_weblogs(
+                    log_lines=iter_file_lines(f), chunksize=chunksize,
+                    geolocation=geolocation)
+            return
+        n_lines = n_records = 0
+        for lines in iter_chunks(log_lines, chunksize):
+            weblogs, errored_lines = WebLogs.from_nginx_weblogs(
+                log_lines=lines, geolocation=geolocation)
+            weblogs.index = pandas.RangeIndex(n_records,
+                                              n_records + len(weblogs))
+            yield weblogs, [n_lines + i for i in errored_lines]
+            n_lines += len(lines)
+            n_records += len(weblogs)
+
+    @staticmethod
+    def from_remote_nginx_weblogs(filename='/var/log/nginx/access.log',
+                                  host='localhost', user='root', offset=0,
+                                  compress=False, transport=None,
+                                  chunksize=100000, geolocation=True):
+        """Return weblogs from the NGINX logs of a remote host.
+
+        The log lines are parsed by chunks (see ``iter_nginx_weblogs``) as
+        they are received, so the raw content of the log is never entirely
+        in memory. See ``lala.remote.open_remote_file`` for the parameters
+        ``filename``, ``host``, ``user``, ``offset`` (to only get the end of
+        the log), ``compress`` and ``transport``.
+
+        Returns ``(weblogs, errored_lines)`` as ``from_nginx_weblogs``.
+        """
+        log_lines = iter_remote_file_lines(
+            filename=filename, host=host, user=user, offset=offset,
+            compress=compress, transport=transport)
+        chunks = list(WebLogs.iter_nginx_weblogs(
+            log_lines=log_lines, chunksize=chunksize, geolocation=geolocation))
+        if len(chunks) == 0:
+            return WebLogs.from_nginx_weblogs(log_lines=[], geolocation=False)
+        weblogs = WebLogs(pandas.concat([w for (w, _) in chunks]))
+        return weblogs, sum([errors for (_, errors) in chunks], [])
+
+    @staticmethod
+    def from_remote_hosts(hosts, filename='/var/log/nginx/access.log',
+                          user='root', n_threads=8, compress=False,
+                          transports=None, geolocation=True):
+        """Return the weblogs of the NGINX logs of several remote hosts.
+
+        The logs are fetched and parsed concurrently (see
+        ``from_remote_nginx_weblogs``), then merged by time, with a ``host``
+        column indicating the host of each entry.
+
+        Parameters
+        ----------
+
+        hosts
+          List of the IP addresses or domain names of the hosts.
+
+        filename
+          Path to the log file on the hosts.
+
+        user
+          Username on the hosts.
+
+        n_threads
+          Maximal number of hosts queried at the same time.
+
+        compress
+          If True, the logs are compressed (gzip) on the hosts for the
+          transfer.
+
+        transports
+          Function ``host => transport`` (see ``lala.remote``). By default the
+          hosts are reached by SSH with persistent connections (see
+          ``lala.remote.multiplexed_ssh_transport``), reused by the next
+          collections.
+
+        geolocation
+          If True, the geolocation columns are added (with a single lookup
+          of the IPs of all hosts).
+
+        Returns ``(weblogs, errored_lines)`` where ``errored_lines`` is a dict
+        ``{host: errored_lines_of_that_host}``.
+        """
+        if transports is None:
+            def transports(host):
+                return multiplexed_ssh_transport(host=host, user=user)
+
+        def fetch_weblogs(host):
+            return WebLogs.from_remote_nginx_weblogs(
+                filename=filename, host=host, user=user, compress=compress,
+                transport=transports(host), geolocation=False)
+
+        with ThreadPoolExecutor(max_workers=n_threads) as executor:
+            results = list(executor.map(fetch_weblogs, hosts))
+        errored_lines = {
+            host: errors
+            for host, (_, errors) in zip(hosts, results)
+        }
+        all_weblogs = []
+        for host, (weblogs, _) in zip(hosts, results):
+            weblogs['host'] = host
+            all_weblogs.append(weblogs)
+        if len(all_weblogs) == 0:
+            all_weblogs = [WebLogs.from_nginx_weblogs(log_lines=[],
+                                                      geolocation=False)[0]]
+        weblogs = pandas.concat(all_weblogs, ignore_index=True)
+        weblogs = weblogs.sort_values('parsed_date', kind='mergesort')
+        weblogs = WebLogs(weblogs.reset_index(drop=True))
+        if geolocation and len(weblogs):
+            weblogs.add_geolocation()
         return weblogs, errored_lines
 
+    @staticmethod
+    def reduce_nginx_weblogs(reducers, filepath=None, log_lines=None,
+                             chunksize=100000):
+        """Compute aggregations over a log without loading it all in memory.
+
+        The log is read by chunks (see ``iter_nginx_weblogs``) and each chunk
+        is fed to every reducer of ``reducers`` (see ``lala.reducers``).
+
+        Returns ``(results, errored_lines)`` where ``results`` is the list of
+        the results of the different reducers.
+
+        Examples
+        --------
+
+        >>> from lala.reducers import CountsReducer, VisitsReducer
+        >>> (countries, visits), errors = WebLogs.reduce_nginx_weblogs(
+        >>>     [CountsReducer('country_name'), VisitsReducer()],
+        >>>     filepath='access.log')
+        """
+        all_errored_lines = []
+        for weblogs, errored_lines in WebLogs.iter_nginx_weblogs(
+                filepath=filepath, log_lines=log_lines, chunksize=chunksize):
+            for reducer in reducers:
+                reducer.update(weblogs)
+            all_errored_lines.extend(errored_lines)
+        return [reducer.result() for reducer in reducers], all_errored_lines
+
     @staticmethod
     def from_weblogs_spreadsheet(filepath=None):
+        """Return weblogs saved in a CSV, Excel or Parquet file, or a store.
+
+        A store is a directory written with ``WebLogs.to_store``.
+        """
+        if os.path.isdir(filepath):
+            return WebLogs.from_store(filepath)
         if filepath.lower().endswith((".csv")):
             dataframe = pandas.read_csv(filepath)
+        elif filepath.lower().endswith((".parquet")):
+            dataframe = pandas.read_parquet(filepath)
         else:
             dataframe = pandas.read_excel(filepath)
         return WebLogs(dataframe)
 
+    @staticmethod
+    def from_store(path, columns=None, start=None, end=None,
+                   time_index=False):
+        """Return the weblogs saved in a store with ``WebLogs.to_store``.
+
+        Only the given ``columns`` (all columns by default) and the entries
+        with ``start <= parsed_date < end`` are read. See
+        ``lala.store.read_store``. If ``time_index`` is True, the weblogs
+        are indexed by time (see ``WebLogs.with_time_index``).
+
+        Examples
+        --------
 
-    def identify_ips_domains(self, logger='bar', known_ips=None):
-        """Add a `ip_owner` column to self."""
+        >>> weblogs = WebLogs.from_store('weblogs_store/', start='2017-12-01',
+        >>>                              columns=['IP', 'country_name'])
+        """
+        weblogs = WebLogs(read_store(path, columns=columns, start=start,
+                                     end=end))
+        if time_index:
+            weblogs = weblogs.with_time_index()
+        return weblogs
+
+    def to_store(self, path, append=False):
+        """Save the weblogs in a store of Parquet files partitioned by day.
+
+        If ``append`` is True, the weblogs are added to the entries already in
+        the store (only new entries should be appended). Otherwise they replace
+        the entries of the same days in the store. See
+        ``lala.store.write_store``.
+        """
+        write_store(self, path, append=append)
+
+
+    def compact(self):
+        """Return a copy of self with a compact memory footprint.
+
+        The repeated text columns (IP, url, browser, country_name...) become
+        categorical, the ``response`` and ``status`` become small integers,
+        the coordinates become float32, and the ``date`` and ``timestamp``
+        columns are dropped (the dates remain in ``parsed_date``). See
+        ``lala.schema``. All WebLogs methods work on compact weblogs.
+        """
+        return compact_dataframe(self)
+
+    def memory_usage_report(self):
+        """Return a dataframe of the memory used by each column, in bytes.
+
+        See ``lala.schema.memory_usage_report``.
+        """
+        return memory_usage_report(self)
+
+    def add_geolocation(self, cache=geoip_cache):
+        """Add the ``country_name``, ``city``, ``country_code3``, ``latitude``
+        and ``longitude`` columns to self.
+
+        Each distinct IP is looked up only once in the GeoLite database, and
+        the records are kept in ``cache`` (by default a LRU cache shared by
+        all weblogs) so that IPs seen in previous logs are not looked up
+        again. New columns are inserted after the ``timestamp`` column if
+        there is one (as in the weblogs parsed from NGINX logs), else at the
+        end.
+        """
+        geo_columns = geolocate_ips(self.IP, geoip=get_geoip(), cache=cache)
+        if 'timestamp' in self.columns:
+            position = self.columns.get_loc('timestamp') + 1
+        else:
+            position = len(self.columns)
+        for field in GEO_FIELDS:
+            if field in self.columns:
+                self.loc[:, field] = geo_columns[field].values
+            else:
+                self.insert(position, field, geo_columns[field].values)
+                position += 1
+
+    def identify_ips_domains(self, logger='bar', known_ips=None,
+                             n_threads=20, timeout=None,
+                             resolver=socket.getfqdn, cache=None):
+        """Add a `domain` column to self, with the domain name of each IP.
+
+        Parameters
+        ----------
+
+        logger
+          Either 'bar' for a progress bar, None, or any proglog logger.
+
+        known_ips
+          A dict ``{ip: domain}`` (or a dataframe with ``IP`` and ``domain``
+          columns) of already-identified IPs, which will not be looked up.
+          The dict is completed with the newly identified IPs, and returned.
+
+        n_threads
+          Number of reverse DNS lookups running concurrently.
+
+        timeout
+          Maximal duration in seconds of a lookup. The IPs with failed or
+          abandoned lookups get the domain 'Unknown'.
+
+        resolver
+          Function ``ip => domain`` performing the reverse DNS lookups.
+
+        cache
+          Optional ``DomainsCache`` persisting the lookups results between
+          runs and processes, or 'default' for a cache at
+          ``conf['domains_cache_path']`` (in the user's data directory). By
+          default (None) the results are not persisted.
+        """
         if isinstance(known_ips, pandas.DataFrame):
             known_ips = {
                 row.IP: row.domain
@@ -213,32 +708,55 @@ class WebLogs(pandas.DataFrame):
             }
         if known_ips is None:
             known_ips = {}
-        if logger == 'bar':
-            logger = proglog.TqdmProgressBarLogger()
 
-        ips_domains = {}
-        for ip in logger.iter_bar(ip=list(set(self.IP))):
-            if ip in known_ips:
-                ips_domains[ip] = known_ips[ip]
-            else:
-                try:
-                    ips_domains[ip] = known_ips[ip] = socket.getfqdn(ip)
-                except socket.herror:
-                    ips_domains[ip] = 'Unknown'
+        if cache == 'default':
+            cache = DomainsCache()
+
+        ips = set(self.IP)
+        new_ips = [ip for ip in ips if ip not in known_ips]
+        cached_domains = {} if cache is None else cache.get_domains(new_ips)
+        new_domains = resolve_domains(
+            [ip for ip in new_ips if ip not in cached_domains],
+            resolver=resolver, n_threads=n_threads, timeout=timeout,
+            logger=logger)
+        if cache is not None:
+            cache.set_domains(new_domains)
+        for domains in (cached_domains, new_domains):
+            known_ips.update({
+                ip: domain
+                for ip, domain in domains.items()
+                if domain is not None
+            })
+        ips_domains = {ip: known_ips.get(ip, 'Unknown') for ip in ips}
         self.loc[:, 'domain'] = [ips_domains[ip] for ip in self.IP]
         return known_ips
 
+    def _ips_in(self, ips_list):
+        """Return a boolean mask of the entries with an IP in the list."""
+        if not isinstance(ips_list, IPRanges):
+            ips_list = IPRanges(ips_list)
+        codes, ips = pandas.factorize(self.IP)
+        # Missing IPs (code -1) take the last (False) element
+        ips_in_list = np.append(ips_list.contains(ips), False)
+        return ips_in_list[codes]
+
     def blacklist_ips(self, ips_blacklist):
-        """Return a new version of self minus the blacklisted ips."""
-        ips_set = set(self.IP)
-        blacklisted_ips = set([
-           ip for ip in ips_set
-           if ip in ips_blacklist
-        ])
-        return self[[
-            ip not in blacklisted_ips
-            for ip in self.IP
-        ]]
+        """Return a new version of self minus the blacklisted ips.
+
+        ``ips_blacklist`` is a list of IPs and CIDR ranges such as
+        "10.0.0.0/8", or a ``lala.ips.IPRanges`` (to build only once a large
+        list used several times). Each distinct IP is converted and looked
+        up only once.
+        """
+        return self[~self._ips_in(ips_blacklist)]
+
+    def whitelist_ips(self, ips_whitelist):
+        """Return a new version of self with only the whitelisted ips.
+
+        ``ips_whitelist`` is a list of IPs and CIDR ranges, or an
+        ``IPRanges``, as in ``blacklist_ips``.
+        """
+        return self[self._ips_in(ips_whitelist)]
 
     def entries_last(self, num, duration):
         """Returns the weblogs of the latest entries up to XX ago.
@@ -251,116 +769,237 @@ class WebLogs(pandas.DataFrame):
         >>> # Filter out all entries more than 5 days old
         >>> last_days_weblogs = self.entries_last(5, 'days')
         """
-        return self[self.timestamp >= time_of_last(num, duration)]
+        start = pandas.Timestamp(time_of_last(num, duration), unit='s',
+                                 tz='UTC')
+        return self.entries_between(start=start)
+
+    def with_time_index(self):
+        """Return a copy of self sorted by time and indexed by parsed_date.
+
+        The time range selections (``entries_between``, ``entries_last``) on
+        the resulting weblogs are binary searches in the sorted index,
+        returning slices of the weblogs rather than filtered copies.
+        """
+        weblogs = self.sort_values('parsed_date', kind='mergesort')
+        weblogs.index = pandas.DatetimeIndex(weblogs['parsed_date'])
+        weblogs.index.name = None
+        return weblogs
+
+    def has_time_index(self):
+        """Return whether self is indexed by sorted times (see
+        ``with_time_index``)."""
+        return (isinstance(self.index, pandas.DatetimeIndex) and
+                self.index.is_monotonic_increasing)
+
+    def entries_between(self, start=None, end=None):
+        """Return the entries with ``start <= parsed_date < end``.
+
+        ``start`` and ``end`` are datetimes or strings such as
+        "2017-12-01 12:00" (assumed to be UTC if they have no timezone), or
+        None for no bound. If self is indexed by time (see
+        ``with_time_index``) the entries are found by binary search.
+        """
+        start = None if start is None else to_utc(start)
+        end = None if end is None else to_utc(end)
+        if self.has_time_index():
+            first = 0 if start is None else self.index.searchsorted(start)
+            last = len(self) if end is None else self.index.searchsorted(end)
+            return self.iloc[first:max(first, last)]
+        # The EPOCH times also work for weblogs reloaded from a spreadsheet,
+        # where the dates are strings
+        timestamps = weblogs_timestamps(self)
+        selected = np.ones(len(self), dtype=bool)
+        if start is not None:
+            selected &= timestamps >= start.timestamp()
+        if end is not None:
+            selected &= timestamps < end.timestamp()
+        return self[selected]
 
     def filter_by_text_search(self, terms, are_in=None, not_in=None):
         """Return a filtered version of self based on searched terms.
-        """
 
+        With ``are_in``, the entries where at least one of the terms is in
+        the text of the ``are_in`` field are kept. With ``not_in``, the
+        entries where none of the terms is in the text of the ``not_in``
+        field are kept (entries with no value in that field are removed).
+        Values which are not texts (e.g. the numeric responses of compact
+        weblogs) are searched in their text representation.
+        ``are_in`` and ``not_in`` can also be lists of fields, in which case
+        the terms are searched in all these fields.
+
+        All the terms are searched at once with a single regular expression
+        (compiled once per list of terms) in the distinct values of the
+        fields only.
+        """
+        fields = are_in if not_in is None else not_in
+        if isinstance(fields, str):
+            fields = [fields]
+        regexpr = _terms_regexpr(tuple(terms))
+        has_text = np.ones(len(self), dtype=bool)
+        has_term = np.zeros(len(self), dtype=bool)
+        for field in fields:
+            codes, values = pandas.factorize(self[field])
+            # Non-text values (e.g. the numbers of compact weblogs) are
+            # searched in their text representation
+            texts = pandas.Series([
+                value if isinstance(value, str) else str(value)
+                for value in values
+            ], dtype=object)
+            # Missing values (code -1) take the last (False) element
+            values_has_text = np.append(np.ones(len(texts), dtype=bool),
+                                        False)
+            values_has_term = np.append(
+                texts.str.contains(regexpr).values.astype(bool), False)
+            has_text &= values_has_text[codes]
+            has_term |= values_has_term[codes]
         if not_in is not None:
-            field = not_in
-            def filtr(v):
-                return (v is not None) and isinstance(v, str) and not any([
-                    term in v for term in terms
-                ])
-        else:
-            field = are_in
-            def filtr(v):
-                return (v is not None) and isinstance(v, str) and any([
-                    term in v for term in terms
-                ])
-        field_dict = {
-            val: filtr(val)
-            for val in set(self[field])
-        }
-        indices = [field_dict[v] for v in self[field]]
-        return self[indices]
+            return self[has_text & ~has_term]
+        return self[has_term]
 
     def cluster_dates(self, max_interval=60):
-        dates_intervals = [[self.parsed_date[0], self.parsed_date[0]]]
-        for date in self.parsed_date[1:]:
-            interval = (date - dates_intervals[-1][-1]).total_seconds()
-            if interval < max_interval:
-                dates_intervals[-1][-1] = date
-            else:
-                dates_intervals.append([date, date])
-        return dates_intervals
+        """Return the list of ``[start, end]`` of the clusters of dates.
+
+        Successive dates (of ``self.parsed_date``) belong to the same cluster
+        when they are less than ``max_interval`` seconds apart.
+        """
+        dates = self.parsed_date.sort_values(kind='mergesort')
+        starts, ends = _sessions_boundaries(
+            np.zeros(len(dates)), dates_to_timestamps(dates), max_interval)
+        return [
+            [start, end]
+            for start, end in zip(dates.iloc[starts], dates.iloc[ends])
+        ]
+
+    @memoized
+    def sessions(self, max_visits_interval=60, per='IP'):
+        """Return a dataframe of the visits of the different visitors.
+
+        Successive hits of a visitor belong to the same visit when they are
+        less than ``max_visits_interval`` seconds apart. The hits are sorted
+        once by visitor and time, and the visits are delimited with
+        vectorized operations.
 
+        The dataframe has one row per visit, sorted by visitor and time, with
+        columns ``visitor`` (the value in the ``per`` column), ``start`` and
+        ``end`` (datetimes), ``n_hits``, and ``duration`` (in seconds).
+        """
+        codes, visitors = pandas.factorize(self[per], sort=True)
+        visitors = np.asarray(visitors, dtype=object)
+        timestamps = dates_to_timestamps(self['parsed_date'])
+        order = np.lexsort((timestamps, codes))
+        order = order[codes[order] >= 0]
+        codes, timestamps = codes[order], timestamps[order]
+        starts, ends = _sessions_boundaries(codes, timestamps,
+                                            max_visits_interval)
+        dates = self['parsed_date']
+        return pandas.DataFrame(OrderedDict([
+            ('visitor', visitors[codes[starts]]),
+            ('start', dates.array.take(order[starts])),
+            ('end', dates.array.take(order[ends])),
+            ('n_hits', ends - starts + 1),
+            ('duration', timestamps[ends] - timestamps[starts]),
+        ]))
+
+    @memoized
     def visitors_and_visits(self, max_visits_interval=60, per='IP'):
-        return {
-            ip: df.cluster_dates(max_interval=max_visits_interval)
-            for ip, df in self.groupby(per)
-            if ip is not None
-        }
+        """Return a dict ``{visitor: [[visit_start, visit_end], ...]}``.
 
+        See ``sessions`` for the definition of the visits.
+        """
+        sessions = self.sessions(max_visits_interval=max_visits_interval,
+                                 per=per)
+        visitors_visits = {}
+        for visitor, start, end in zip(sessions.visitor, sessions.start,
+                                       sessions.end):
+            visitors_visits.setdefault(visitor, []).append([start, end])
+        return visitors_visits
+
+    @memoized
     def most_frequent_visitors(self, criterion='n_visits', n_visitors='all',
                                max_visits_interval=60, per='IP'):
-        visitors = self.visitors_and_visits(
-            max_visits_interval=max_visits_interval, per=per)
-        if n_visitors == 'all':
-            n_visitors = len(visitors.keys())
+        """Return a list ``[(score, visitor), ...]`` of the top visitors.
 
-        criterion_function = {
-            'n_visits': lambda visits: len(visits),
-            'time_spent': lambda visits: sum([(v[1] - v[0]).total_seconds()
-                                              for v in visits]) / 60.0
-        }[criterion]
+        The ``criterion`` is either 'n_visits' (number of visits) or
+        'time_spent' (total duration of the visits, in minutes). The visitors
+        are sorted by decreasing score (then by decreasing visitor name).
 
-        return sorted([
-            (criterion_function(visits), visitor)
-            for visitor, visits in visitors.items()
-        ])[::-1][:n_visitors]
-
-    def visitors_locations(self):
+        ``criterion`` can also be a list of criteria, in which case the visits
+        are computed once and a dict ``{criterion: [(score, visitor), ...]}``
+        is returned.
+        """
+        sessions = self.sessions(max_visits_interval=max_visits_interval,
+                                 per=per)
+        # Sessions are sorted by visitor so the codes follow the visitors order
+        codes, visitors = pandas.factorize(sessions.visitor)
+        visitors = np.asarray(visitors, dtype=object)
+        scores_functions = {
+            'n_visits': lambda: np.bincount(codes, minlength=len(visitors)),
+            'time_spent': lambda: np.bincount(
+                codes, weights=sessions.duration.values,
+                minlength=len(visitors)) / 60.0
+        }
+        if n_visitors == 'all':
+            n_visitors = len(visitors)
+        if isinstance(criterion, str):
+            scores = scores_functions[criterion]()
+            return _top_scores(scores, visitors, n_visitors)
         return {
-            ip: " ".join([
-                df.iloc[0].city if df.iloc[0].city else "",
-                df.iloc[0].country_name if df.iloc[0].country_name else ""
-            ])
-            for ip, df in self.groupby('IP')
+            c: _top_scores(scores_functions[c](), visitors, n_visitors)
+            for c in criterion
         }
 
+    @memoized
+    def visitors_locations(self):
+        """Return a dict ``{ip: "city country_name"}`` of the visitors.
+
+        The location of a visitor is the one of its first entry (with an
+        empty city or country name when it is unknown). The first entries
+        are found with ``drop_duplicates``, and the distinct cities and
+        countries are converted to strings once.
+        """
+        firsts = self[['IP', 'city', 'country_name']].drop_duplicates('IP')
+        firsts = firsts[firsts.IP.notnull()]
+        locations = (_strings_or_empty(firsts.city) + " " +
+                     _strings_or_empty(firsts.country_name))
+        return dict(zip(firsts.IP.tolist(), locations.tolist()))
+
 
     def countries_colormap(self, mini='auto', maxi='auto', ax=None):
-        """Plot a colormap of different countries, return the Matplotlib ax.
+        """Plot a colormap of the countries hits, return the Matplotlib ax.
 
         Parameters
         ----------
-        country_values
-          A list of couples (coutry_name, value)
 
         mini, maxi
           Extreme values leading to read or white colors. Leave to auto to adjust
-          this range to the values of country_values.
+          this range to the numbers of hits of the countries.
 
         ax
           A Matplotlib ax with a representation of the world. If None, one is
           created automatically
         """
-        if not CARTOPY_INSTALLED:
-            raise ImportError('This feature requires Cartopy installed.')
-        country_values = self.country_name.value_counts()
-        countries = country_values.index
-        values = country_values.values
-        if mini == 'auto':
-            mini = values.min()
-        if maxi == 'auto':
-            maxi = values.max()
-        values = (values - mini) / (maxi - mini)
-        country_values = zip(countries, values)
-
-        if ax is None:
-            ax = init_map(figsize=(12, 8), extent=(-150, 60, -25, 60))
-        for (country_name, value) in country_values:
-            if country_name not in name_to_geometry:
-                continue
-            color = cm.YlOrBr(value)
-            ax.add_geometries(name_to_geometry[country_name], ccrs.PlateCarree(),
-                              facecolor=color)
-        return ax
+        return plots.countries_colormap(self._countries_hits(), mini=mini,
+                                        maxi=maxi, ax=ax)
+
+    @memoized
+    def _countries_hits(self):
+        # The 3-letter codes match the map's countries better than the names
+        if 'country_code3' in self.columns:
+            return self.country_code3.value_counts()
+        return self.country_name.value_counts()
+
+    @memoized
+    def _positions_counts(self):
+        return self.groupby(['longitude', 'latitude'], sort=False).size()
+
+    @memoized
+    def _column_counts(self, column):
+        count = self[column].value_counts()
+        return count[count > 0]
 
 
-    def plot_geo_positions(self, ax=None, country_colors=True):
+    def plot_geo_positions(self, ax=None, country_colors=True,
+                           max_points=1000, resolution=None, hexbin=False):
         """Plot circles on a map around positions of the entries in the access log.
 
         Parameters
@@ -368,29 +1007,32 @@ class WebLogs(pandas.DataFrame):
 
         ax
           Matplotlib ax with a representation of the world.
+
+        country_colors
+          If True, the countries are also colored by number of hits.
+
+        max_points
+          Maximal number of circles drawn (the positions with the most hits
+          first). None for no limit.
+
+        resolution
+          If provided, the positions are grouped in cells of this size (in
+          degrees) before being drawn.
+
+        hexbin
+          If True, the hits are drawn as a hexagonal heatmap (with hexagons
+          of ``resolution`` degrees) instead of circles.
         """
-        if not CARTOPY_INSTALLED:
-            raise ImportError('This feature requires Cartopy installed.')
-        if ax is None:
-            ax = init_map(figsize=(12, 8), extent=(-150, 60, -25, 60))
+        country_values = None
         if country_colors:
-            self.countries_colormap(mini='auto', maxi='auto', ax=ax)
-
-        counts = [
-            (len(dataframe_), ll)
-            for (ll, dataframe_) in self.groupby(['longitude', 'latitude'])
-        ]
-        counts, xy = zip(*(sorted(counts)[::-1]))
-        counts = 1.0 * np.array(counts)
-        counts = np.maximum(5, 600 * counts / counts.max())
-        xx, yy = [list(e) for e in zip(*xy)]
-        ax.scatter(xx, yy, c='w', s=counts, zorder=2000, linewidths=2,
-                   edgecolor='k', transform=ccrs.Geodetic())
-        return ax
+            country_values = self._countries_hits()
+        return plots.plot_geo_positions(
+            self._positions_counts(), country_values=country_values, ax=ax,
+            max_points=max_points, resolution=resolution, hexbin=hexbin)
 
 
     def plot_piechart(self, column, ax=None):
-        """Plot circles on a map around positions of the entries in the access log.
+        """Plot a pie chart of the number of entries per value of a column.
 
         Parameters
         ----------
@@ -402,13 +1044,8 @@ class WebLogs(pandas.DataFrame):
           Matplotlib ax on which to plot the pie chart. If None, one is created
           automatically.
         """
-        count = self[column].value_counts()
-        if ax is None:
-            fig, ax = plt.subplots(1)
-        ax = count.plot(kind='pie', ax=ax)
-        ax.set_aspect('equal')
-        ax.set_ylabel('')
-        return ax, count
+        count = self._column_counts(column)
+        return plots.plot_piechart(count, ax=ax), count
 
 
     def plot_timeline(self, bins_per_day=4, ax=None):
@@ -424,23 +1061,29 @@ class WebLogs(pandas.DataFrame):
           Matplotlib ax on which to plot the profile. If None, one is created
           automatically.
         """
-        mini, maxi = self['timestamp'].min(), self['timestamp'].max()
-        bins = int(bins_per_day * (maxi - mini) / durations['day'])
-        if ax is None:
-            fig, ax = plt.subplots(1, figsize=(12, 3))
-        self['timestamp'].plot(kind='hist', bins=bins, alpha=0.6)
-        x_ticks = ax.get_xticks()
-        xlabels = [datetime.fromtimestamp(int(x)).strftime('%Y-%m-%d')
-                   for x in x_ticks]
-        ax.set_xticklabels(xlabels, rotation=45)
-        ax.set_xlim(mini, maxi)
-        ax.set_ylabel('occurences')
-        return ax
+        return plots.plot_timeline(weblogs_timestamps(self),
+                                   bins_per_day=bins_per_day, ax=ax)
+
+    def rollup_cube(self, bucket_duration=3600,
+                    dimensions=DEFAULT_DIMENSIONS):
+        """Return a ``lala.rollups.RollupCube`` of the hits of the weblogs.
+
+        The cube holds the numbers of hits per time bucket (of
+        ``bucket_duration`` seconds) and per combination of the
+        ``dimensions`` (country, response, method...). Charts can then be
+        drawn from the cube without going through the entries again.
+        """
+        cube = RollupCube(bucket_duration=bucket_duration,
+                          dimensions=dimensions)
+        cube.update(self)
+        return cube
 
 
 
     def plot_most_frequent_visitors(self, plot_ips=True, n_visitors='all',
                                     criterion='n_visits'):
+        import matplotlib.pyplot as plt
+        from matplotlib.ticker import MaxNLocator
         visitors_locations = self.visitors_locations()
         most_frequent = self.most_frequent_visitors(
             criterion=criterion, n_visitors=n_visitors)
@@ -475,7 +1118,31 @@ class WebLogs(pandas.DataFrame):
 
     def write_report(self, template_path=None, template_string=None,
                   target=None, stylesheets=(), **context):
-        html = pug_to_html(path=template_path,
-                           string=template_string,
-                           weblogs=self, **context)
+        from pdf_reports import write_report
+        html = report_to_html(template_path=template_path,
+                              template_string=template_string,
+                              weblogs=self, **context)
         return write_report(html, target=target, extra_stylesheets=stylesheets)
+
+    def write_reports(self, reports, template_path=None, template_string=None,
+                      shared_aggregations=None, stylesheets=(), n_jobs=None,
+                      logger='bar'):
+        """Write a batch of reports on different selections of the entries.
+
+        See ``lala.reports.write_reports`` for the parameters. Returns a dict
+        ``{target: exception}`` of the reports which could not be written.
+
+        Examples
+        --------
+
+        >>> errors = weblogs.write_reports(
+        >>>     [dict(target='front1.pdf', filters=dict(host='front1')),
+        >>>      dict(target='front2.pdf', filters=dict(host='front2'))],
+        >>>     template_path='template.pug',
+        >>>     shared_aggregations=dict(total_hits=len))
+        """
+        return write_reports(
+            self, reports, template_path=template_path,
+            template_string=template_string,
+            shared_aggregations=shared_aggregations, stylesheets=stylesheets,
+            n_jobs=n_jobs, logger=logger)
@@ -4,4 +4,5 @@
 
 from .conf import conf
 from .WebLogs import WebLogs
+from .remote import get_remote_file_content
 from .version import __version__
@@ -6,5 +6,15 @@ conf = {
     'data_dir': data_dir,
     'geolite_url': "http://geolite.maxmind.com/download/"
                    "geoip/database/GeoLiteCity.dat.gz",
-    'geolite_path': os.path.join(data_dir, 'GeoLiteCity.dat')
+    'geolite_path': os.path.join(data_dir, 'GeoLiteCity.dat'),
+    # One of "standard", "mmap", "memory", "range_table"
+    'geoip_backend': 'mmap',
+    'domains_cache_path': os.path.join(data_dir, 'domains_cache.sqlite'),
+    'domains_cache_ttl': 60 * 60 * 24 * 30,
+    'domains_cache_negative_ttl': 60 * 60 * 24,
+    'domains_cache_max_size': 1000000,
+    'countries_geometries_path': os.path.join(data_dir,
+                                              'countries_geometries.pickle'),
+    # Private directory of the sockets of the multiplexed SSH connections
+    'ssh_control_directory': os.path.join(os.path.expanduser('~'), '.ssh'),
 }
@@ -0,0 +1,199 @@
+"""Identification of the domains of IP addresses by reverse DNS."""
+
+from contextlib import contextmanager
+import os
+import queue
+import socket
+import sqlite3
+import threading
+import time
+
+import proglog
+
+from .conf import conf
+
+
+def resolve_domains(ips, resolver=socket.getfqdn, n_threads=20,
+                    timeout=None, logger=None):
+    """Return a dict ``{ip: domain}`` of the domains of the given IPs.
+
+    The domain is None for the IPs unknown to the DNS, or whose lookup
+    failed (the resolver raised an ``OSError``, such as ``socket.herror``
+    or ``socket.gaierror``). The IPs whose lookup timed out are absent from
+    the result.
+
+    Parameters
+    ----------
+
+    ips
+      A list of IP addresses.
+
+    resolver
+      Function ``ip => domain`` performing the reverse DNS lookup. It can
+      raise ``socket.herror`` (or any ``OSError``) for unknown IPs.
+
+    n_threads
+      Maximal number of lookups running concurrently, in daemon threads.
+
+    timeout
+      Maximal duration in seconds of a single lookup, or None for no limit.
+      Lookups taking longer are abandoned: their thread is replaced by a
+      new thread for the next lookups, and as it is a daemon thread it
+      does not prevent the Python process from exiting.
+
+    logger
+      A proglog logger, or 'bar' for a progress bar, or None.
+    """
+    logger = proglog.default_bar_logger(logger)
+    ips = list(ips)
+    tasks = queue.Queue()
+    for ip in ips:
+        tasks.put(ip)
+    results = queue.Queue()
+    start_times = {}
+
+    def lookup_domains():
+        while True:
+            try:
+                ip = tasks.get_nowait()
+            except queue.Empty:
+                return
+            start_times[ip] = time.time()
+            try:
+                results.put((ip, resolver(ip), None))
+            except OSError:
+                results.put((ip, None, None))
+            except Exception as error:
+                results.put((ip, None, error))
+
+    def start_thread():
+        threading.Thread(target=lookup_domains, daemon=True).start()
+
+    for _ in range(min(max(1, n_threads), len(ips))):
+        start_thread()
+    domains, abandoned = {}, set()
+    n_finished = 0
+    wait_timeout = None if timeout is None else min(0.1, timeout)
+    logger(ip__total=len(ips), ip__index=0)
+    while n_finished < len(ips):
+        try:
+            ip, domain, error = results.get(timeout=wait_timeout)
+        except queue.Empty:
+            pass
+        else:
+            start_times.pop(ip, None)
+            if error is not None:
+                raise error
+            if ip not in abandoned:
+                domains[ip] = domain
+                n_finished += 1
+        if timeout is not None:
+            now = time.time()
+            for ip, start_time in list(start_times.items()):
+                if (ip not in abandoned) and (now - start_time > timeout):
+                    abandoned.add(ip)
+                    n_finished += 1
+                    start_thread()
+        logger(ip__index=n_finished)
+    return domains
+
+
+class DomainsCache:
+    """Persistent cache of the domains of IPs, in a SQLite database.
+
+    The cache is shared by all processes and runs using the same database
+    file. Both the domains found and the IPs unknown to the DNS (negative
+    results) are cached.
+
+    Parameters
+    ----------
+
+    path
+      Path to the SQLite database. Defaults to ``conf['domains_cache_path']``.
+
+    ttl
+      Time in seconds after which a cached domain expires.
+
+    negative_ttl
+      Time in seconds after which a negative result expires.
+
+    max_size
+      Maximal number of entries. When the cache is larger, the oldest
+      entries are evicted.
+    """
+
+    def __init__(self, path=None, ttl=None, negative_ttl=None,
+                 max_size=None):
+        self.path = conf['domains_cache_path'] if path is None else path
+        self.ttl = conf['domains_cache_ttl'] if ttl is None else ttl
+        self.negative_ttl = (conf['domains_cache_negative_ttl']
+                             if negative_ttl is None else negative_ttl)
+        self.max_size = (conf['domains_cache_max_size']
+                         if max_size is None else max_size)
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS domains "
+                "(ip TEXT PRIMARY KEY, domain TEXT, time REAL)")
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS domains_time ON domains (time)")
+
+    @contextmanager
+    def _connection(self):
+        connection = sqlite3.connect(self.path, timeout=60)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            yield connection
+            connection.commit()
+        finally:
+            connection.close()
+
+    def get_domains(self, ips, batch_size=500):
+        """Return a dict ``{ip: domain}`` of the non-expired cached IPs.
+
+        The domain is None for the (non-expired) negative results.
+        """
+        ips = list(ips)
+        now = time.time()
+        domains = {}
+        with self._connection() as connection:
+            for start in range(0, len(ips), batch_size):
+                batch = ips[start:start + batch_size]
+                rows = connection.execute(
+                    "SELECT ip, domain, time FROM domains WHERE ip IN (%s)" %
+                    ", ".join(len(batch) * "?"), batch)
+                for ip, domain, cache_time in rows:
+                    ttl = self.negative_ttl if domain is None else self.ttl
+                    if now - cache_time <= ttl:
+                        domains[ip] = domain
+        return domains
+
+    def set_domains(self, domains):
+        """Store a dict ``{ip: domain_or_None}`` in the cache."""
+        now = time.time()
+        with self._connection() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO domains VALUES (?, ?, ?)",
+                [(ip, domain, now) for ip, domain in domains.items()])
+        self.evict()
+
+    def evict(self):
+        """Remove the expired entries and the oldest excess entries."""
+        now = time.time()
+        with self._connection() as connection:
+            connection.execute(
+                "DELETE FROM domains WHERE (domain IS NULL AND time < ?) "
+                "OR time < ?", (now - self.negative_ttl, now - self.ttl))
+            size, = connection.execute(
+                "SELECT COUNT(*) FROM domains").fetchone()
+            if size > self.max_size:
+                connection.execute(
+                    "DELETE FROM domains WHERE ip IN (SELECT ip FROM domains "
+                    "ORDER BY time LIMIT ?)", (size - self.max_size,))
+
+    def __len__(self):
+        with self._connection() as connection:
+            return connection.execute(
+                "SELECT COUNT(*) FROM domains").fetchone()[0]
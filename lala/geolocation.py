@@ -0,0 +1,253 @@
+"""Geolocation of IP addresses, with one database lookup per unique IP."""
+
+from collections import OrderedDict
+from functools import lru_cache
+from urllib.request import urlopen
+import gzip
+import os
+import shutil
+
+import numpy as np
+import pandas
+
+from .conf import conf
+from .ips import ipv4_to_int
+
+GEO_FIELDS = ['country_name', 'city', 'country_code3', 'latitude',
+              'longitude']
+NUMERIC_GEO_FIELDS = ['latitude', 'longitude']
+
+
+class GeoIPBackend:
+    """Geolocation of IPs with a GeoLite City (legacy format) database.
+
+    Parameters
+    ----------
+
+    path
+      Path to the GeoLiteCity.dat database.
+
+    mode
+      Either "standard" (every lookup reads the file), "mmap" (the file is
+      memory-mapped) or "memory" (the file is entirely loaded in memory).
+    """
+
+    modes = {
+        'standard': 'STANDARD',
+        'mmap': 'MMAP_CACHE',
+        'memory': 'MEMORY_CACHE',
+    }
+
+    def __init__(self, path, mode='mmap'):
+        import pygeoip
+        self.path = path
+        flags = getattr(pygeoip, self.modes[mode])
+        self.geoip = pygeoip.GeoIP(path, flags=flags)
+
+    def record_by_addr(self, ip):
+        """Return the record (dict) of the IP, or None if it is unknown."""
+        return self.geoip.record_by_addr(ip)
+
+    def records_by_addrs(self, ips):
+        """Return the list of the records of the IPs (dicts or None)."""
+        return [self.record_by_addr(ip) for ip in ips]
+
+
+class GeoIPRangeTable(GeoIPBackend):
+    """Geolocation backend looking up IPv4 addresses in a NumPy range table.
+
+    At initialization, the binary tree of the database is flattened into a
+    sorted array of the start addresses of the IP ranges, and an array of
+    the offsets of the ranges' records. The locations of IPv4 addresses are
+    then found with a single ``searchsorted`` over the integer values of all
+    the IPs, and only one record is read per distinct location. Other
+    addresses (e.g. IPv6) are looked up in the database.
+    """
+
+    def __init__(self, path):
+        import pygeoip
+        GeoIPBackend.__init__(self, path, mode='memory')
+        geoip = self.geoip
+        if geoip._databaseType not in (pygeoip.const.CITY_EDITION_REV0,
+                                       pygeoip.const.CITY_EDITION_REV1):
+            raise ValueError("The range table backend requires an IPv4 "
+                             "GeoLite City database.")
+        self.no_record = geoip._databaseSegments
+        record_length = geoip._recordLength
+        with open(path, 'rb') as f:
+            tree = f.read(2 * record_length * self.no_record)
+        tree = np.frombuffer(tree, dtype=np.uint8).astype('int64')
+        tree = tree.reshape(self.no_record, 2, record_length)
+        children = sum(tree[:, :, j] << (8 * j) for j in range(record_length))
+        nodes, nodes_starts = np.array([0]), np.array([0])
+        ranges_starts, ranges_records = [], []
+        for depth in range(31, -1, -1):
+            next_nodes, next_starts = [], []
+            for bit in (0, 1):
+                values = children[nodes, bit]
+                starts = nodes_starts + bit * (1 << depth)
+                is_leaf = values >= self.no_record
+                ranges_starts.append(starts[is_leaf])
+                ranges_records.append(values[is_leaf])
+                next_nodes.append(values[~is_leaf])
+                next_starts.append(starts[~is_leaf])
+            nodes = np.concatenate(next_nodes)
+            nodes_starts = np.concatenate(next_starts)
+        ranges_starts = np.concatenate(ranges_starts)
+        order = np.argsort(ranges_starts)
+        self.ranges_starts = ranges_starts[order]
+        self.ranges_records = np.concatenate(ranges_records)[order]
+
+    def records_offsets(self, ipnums):
+        """Return the offsets of the records of IPv4 integer values."""
+        indices = np.searchsorted(self.ranges_starts, ipnums, side='right')
+        return self.ranges_records[indices - 1]
+
+    def records_by_addrs(self, ips):
+        ips = np.asarray(ips, dtype=object)
+        records = np.array(len(ips) * [None], dtype=object)
+        ipnums = ipv4_to_int(ips)
+        is_ipv4 = ipnums >= 0
+        offsets = self.records_offsets(ipnums[is_ipv4])
+        codes, unique_offsets = pandas.factorize(offsets)
+        first_ips = pandas.Series(ips[is_ipv4]).groupby(codes).first()
+        unique_records = np.array([
+            None if offset == self.no_record else self.record_by_addr(ip)
+            for (offset, ip) in zip(unique_offsets, first_ips)
+        ] + [None], dtype=object)
+        records[is_ipv4] = unique_records[codes]
+        records[~is_ipv4] = [self.record_by_addr(ip)
+                             for ip in ips[~is_ipv4]]
+        return list(records)
+
+
+def create_geoip_backend(path, backend='mmap'):
+    """Return a geolocation backend for the given database.
+
+    ``backend`` is one of "standard", "mmap", "memory" (see ``GeoIPBackend``)
+    or "range_table" (see ``GeoIPRangeTable``).
+    """
+    if backend == 'range_table':
+        return GeoIPRangeTable(path)
+    return GeoIPBackend(path, mode=backend)
+
+
+def download_geolite_database(url=None, path=None):
+    """Download and decompress the GeoLite City database.
+
+    By default, ``conf['geolite_url']`` is downloaded to
+    ``conf['geolite_path']``.
+    """
+    url = conf['geolite_url'] if url is None else url
+    path = conf['geolite_path'] if path is None else path
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    response = urlopen(url)
+    with gzip.GzipFile(fileobj=response) as f_gz, open(path, 'wb') as f:
+        shutil.copyfileobj(f_gz, f)
+
+
+@lru_cache(maxsize=None)
+def _get_geoip_backend(path, backend):
+    if not os.path.exists(path):
+        download_geolite_database(path=path)
+    return create_geoip_backend(path, backend)
+
+
+def get_geoip():
+    """Return the geolocation backend configured in ``lala.conf``.
+
+    The backend is created on first use (the database is downloaded if it is
+    not yet in ``conf['geolite_path']``), then reused.
+    """
+    return _get_geoip_backend(conf['geolite_path'], conf['geoip_backend'])
+
+
+class GeoIPCache:
+    """Least-recently-used cache of the geolocation records of IP addresses.
+
+    The cache is shared by all the loads of a process so that the IPs
+    already seen in previous logs are not looked up again. Unknown IPs are
+    cached too (with a ``None`` record).
+
+    Parameters
+    ----------
+
+    max_size
+      Maximal number of IP records kept in the cache.
+    """
+
+    def __init__(self, max_size=500000):
+        self.max_size = max_size
+        self.records = OrderedDict()
+        self.n_hits = 0
+        self.n_lookups = 0
+
+    def get_records(self, ips, geoip):
+        """Return the records of the IPs, looking up those not in the cache.
+
+        The IPs which are not in the cache are looked up all at once with
+        ``geoip.records_by_addrs`` (see ``GeoIPBackend``).
+        """
+        new_ips = [ip for ip in ips if ip not in self.records]
+        self.n_lookups += len(new_ips)
+        self.n_hits += len(ips) - len(new_ips)
+        new_records = dict(zip(new_ips, geoip.records_by_addrs(new_ips)))
+        records = []
+        for ip in ips:
+            if ip in new_records:
+                self.records[ip] = new_records[ip]
+            else:
+                self.records.move_to_end(ip)
+            records.append(self.records[ip])
+        while len(self.records) > self.max_size:
+            self.records.popitem(last=False)
+        return records
+
+    def clear(self):
+        self.records.clear()
+        self.n_hits = self.n_lookups = 0
+
+
+geoip_cache = GeoIPCache()
+
+
+def geolocate_ips(ips, geoip, cache=geoip_cache):
+    """Return a dataframe of the geolocation fields of a series of IPs.
+
+    Each distinct IP is only looked up once (or not at all if it is already
+    in the ``cache``), then the records are scattered back to all the rows
+    with the codes of ``pandas.factorize``.
+
+    Parameters
+    ----------
+
+    ips
+      A list, array or series of IP addresses (strings).
+
+    geoip
+      A geolocation backend (see ``GeoIPBackend``).
+
+    cache
+      A ``GeoIPCache`` or None for no caching.
+    """
+    index = ips.index if isinstance(ips, pandas.Series) else None
+    codes, unique_ips = pandas.factorize(np.asarray(ips, dtype=object))
+    if cache is None:
+        records = geoip.records_by_addrs(unique_ips)
+    else:
+        records = cache.get_records(unique_ips, geoip)
+    # Records of unknown IPs and missing IPs (code -1) are the last element
+    records = [r if r is not None else {} for r in records] + [{}]
+    codes = np.where(codes < 0, len(records) - 1, codes)
+    columns = OrderedDict()
+    for field in GEO_FIELDS:
+        if field in NUMERIC_GEO_FIELDS:
+            values = np.array([r.get(field, np.nan) for r in records],
+                              dtype='float64')
+        else:
+            values = np.array([r.get(field, None) for r in records],
+                              dtype=object)
+        columns[field] = values.take(codes)
+    return pandas.DataFrame(columns, index=index)
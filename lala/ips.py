@@ -0,0 +1,133 @@
+"""Vectorized conversions of IP addresses, and sets of IP ranges."""
+
+import ipaddress
+import re
+
+import numpy as np
+
+from .parsing import findall_array
+
+_IPV4_LINES_REGEXPR = re.compile(
+    r'^(?:(\d{1,3})\.(\d{1,3})\.(\d{1,3})\.(\d{1,3})|.*)$', re.MULTILINE)
+_IPV4_CIDR_LINES_REGEXPR = re.compile(
+    r'^(?:(\d{1,3})\.(\d{1,3})\.(\d{1,3})\.(\d{1,3})(?:/(\d{1,2}))?|.*)$',
+    re.MULTILINE)
+
+
+def ipv4_to_int(ips):
+    """Return an array of the integer values of IPv4 addresses.
+
+    ``ips`` is a list, array or series of strings. The value is -1 for
+    elements which are not IPv4 addresses (IPv6 addresses, None, etc.).
+    """
+    ips = ['' if not isinstance(ip, str) else ip for ip in ips]
+    octets = findall_array(_IPV4_LINES_REGEXPR, ips, 4)
+    is_ipv4 = octets[:, 0] != ''
+    octets[~is_ipv4] = '0'
+    octets = octets.astype('int64')
+    is_ipv4 &= (octets <= 255).all(axis=1)
+    result = ((octets[:, 0] << 24) + (octets[:, 1] << 16) +
+              (octets[:, 2] << 8) + octets[:, 3])
+    result[~is_ipv4] = -1
+    return result
+
+
+def ipv4_cidrs_to_intervals(cidrs):
+    """Return the arrays ``(starts, ends)`` of the bounds of IPv4 ranges.
+
+    ``cidrs`` is a list of CIDR ranges such as "10.0.0.0/8", or single IPs.
+    The bounds are the integer values of the first and last IPs of the
+    ranges (both included). Both bounds are -1 for the elements which are
+    not IPv4 ranges (IPv6 ranges, None, etc.).
+    """
+    cidrs = ['' if not isinstance(cidr, str) else cidr.strip()
+             for cidr in cidrs]
+    fields = findall_array(_IPV4_CIDR_LINES_REGEXPR, cidrs, 5)
+    is_ipv4 = fields[:, 0] != ''
+    fields[~is_ipv4, :4] = '0'
+    fields[fields[:, 4] == '', 4] = '32'
+    fields = fields.astype('int64')
+    is_ipv4 &= (fields[:, :4] <= 255).all(axis=1) & (fields[:, 4] <= 32)
+    octets, prefixes = fields[:, :4], np.minimum(fields[:, 4], 32)
+    ipnums = ((octets[:, 0] << 24) + (octets[:, 1] << 16) +
+              (octets[:, 2] << 8) + octets[:, 3])
+    sizes = np.left_shift(1, 32 - prefixes)
+    starts = ipnums - ipnums % sizes
+    ends = starts + sizes - 1
+    starts[~is_ipv4] = ends[~is_ipv4] = -1
+    return starts, ends
+
+
+class IPRanges:
+    """Set of IP addresses defined by a list of IPs and CIDR ranges.
+
+    The IPv4 ranges are merged into sorted, disjoint intervals of integers,
+    in which IPs are looked up with a binary search (``np.searchsorted``),
+    so that hundreds of thousands of ranges can be checked against millions
+    of IPs. IPv6 ranges (usually few) are checked with ``ipaddress``.
+
+    Parameters
+    ----------
+
+    ranges
+      List of IPs and CIDR ranges, for instance
+      ``["10.0.0.0/8", "1.2.3.4", "2001:db8::/32"]``. Empty strings and
+      None are ignored, and the other elements which are not IPs or ranges
+      (e.g. "localhost") only match the exact same strings.
+    """
+
+    def __init__(self, ranges):
+        ranges = list(ranges)
+        starts, ends = ipv4_cidrs_to_intervals(ranges)
+        is_ipv4 = starts >= 0
+        self.ipv6_networks = []
+        self.other_values = set()
+        for ip_range, range_is_ipv4 in zip(ranges, is_ipv4):
+            if range_is_ipv4 or not isinstance(ip_range, str):
+                continue
+            ip_range = ip_range.strip()
+            if ip_range == '':
+                continue
+            try:
+                self.ipv6_networks.append(
+                    ipaddress.ip_network(ip_range, strict=False))
+            except ValueError:
+                self.other_values.add(ip_range)
+        order = np.argsort(starts[is_ipv4], kind='mergesort')
+        starts, ends = starts[is_ipv4][order], ends[is_ipv4][order]
+        # Overlapping or contiguous intervals are merged
+        max_ends = np.maximum.accumulate(ends)
+        is_new_interval = np.ones(len(starts), dtype=bool)
+        is_new_interval[1:] = starts[1:] > max_ends[:-1] + 1
+        is_last_of_interval = np.append(is_new_interval[1:], True)
+        self.starts = starts[is_new_interval]
+        self.ends = max_ends[is_last_of_interval[:len(starts)]]
+
+    def __len__(self):
+        return (len(self.starts) + len(self.ipv6_networks) +
+                len(self.other_values))
+
+    def contains(self, ips):
+        """Return a boolean array indicating which IPs are in the ranges.
+
+        ``ips`` is a list, array or series of IP addresses (strings).
+        """
+        ips = np.asarray(ips, dtype=object)
+        ipnums = ipv4_to_int(ips)
+        result = np.zeros(len(ips), dtype=bool)
+        if len(self.starts):
+            indices = np.searchsorted(self.starts, ipnums, side='right') - 1
+            result = ((ipnums >= 0) & (indices >= 0) &
+                      (ipnums <= self.ends[np.maximum(indices, 0)]))
+        if len(self.ipv6_networks) or len(self.other_values):
+            for i in (ipnums < 0).nonzero()[0]:
+                if isinstance(ips[i], str) and ips[i] in self.other_values:
+                    result[i] = True
+                    continue
+                try:
+                    address = ipaddress.ip_address(ips[i])
+                except ValueError:
+                    continue
+                result[i] = any(address in network
+                                for network in self.ipv6_networks)
+        return result
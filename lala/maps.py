@@ -0,0 +1,149 @@
+"""World maps and countries geometries.
+
+Cartopy and the Natural Earth shapefiles are only loaded on first use, so
+that importing lala stays fast and does no I/O. The countries geometries
+read from the shapefile are then cached on disk (as WKB, in
+``conf['countries_geometries_path']``) for the next processes, and their
+projections on a map are computed once per projection.
+"""
+
+from functools import lru_cache
+import importlib.util
+import os
+import pickle
+
+from .conf import conf
+
+CARTOPY_INSTALLED = importlib.util.find_spec('cartopy') is not None
+# Natural Earth fields by which a country can be designated. ISO_A3 and
+# ADM0_A3 match the country_code3 of the geolocation.
+COUNTRY_KEY_FIELDS = ('ADM0_A3', 'ISO_A3', 'BRK_NAME', 'NAME', 'NAME_LONG',
+                      'ADMIN', 'FORMAL_EN')
+
+
+def _check_cartopy():
+    if not CARTOPY_INSTALLED:
+        raise ImportError('This feature requires Cartopy installed.')
+
+
+def _read_natural_earth_countries():
+    """Return a list ``[(keys, geometry)]`` of the countries in the Natural
+    Earth shapefile, where ``keys`` are the names and codes of the country.
+    """
+    import cartopy.io.shapereader as shpreader
+    shpfilename = shpreader.natural_earth(resolution='110m',
+                                          category='cultural',
+                                          name='admin_0_countries')
+    countries = []
+    for record in shpreader.Reader(shpfilename).records():
+        keys = [record.attributes.get(field) for field in COUNTRY_KEY_FIELDS]
+        keys = [key for key in keys
+                if isinstance(key, str) and key not in ('', '-99')]
+        countries.append((keys, record.geometry))
+    return countries
+
+
+def load_countries(cache_path=None):
+    """Return the list ``[(keys, geometry)]`` of the countries.
+
+    The geometries are read from ``cache_path`` if the file exists, else from
+    the Natural Earth shapefile and then saved (as WKB) at ``cache_path``.
+    No cache is used if ``cache_path`` is None.
+    """
+    _check_cartopy()
+    import shapely.wkb
+    if (cache_path is not None) and os.path.exists(cache_path):
+        with open(cache_path, 'rb') as f:
+            countries = pickle.load(f)
+        return [(keys, shapely.wkb.loads(wkb)) for keys, wkb in countries]
+    countries = _read_natural_earth_countries()
+    if cache_path is not None:
+        directory = os.path.dirname(cache_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        temporary_path = cache_path + '.tmp'
+        with open(temporary_path, 'wb') as f:
+            pickle.dump([(keys, shapely.wkb.dumps(geometry))
+                         for keys, geometry in countries], f)
+        os.replace(temporary_path, cache_path)
+    return countries
+
+
+@lru_cache(maxsize=1)
+def get_countries():
+    """Return ``(geometries, lookup)``.
+
+    ``geometries`` is the list of the countries geometries and ``lookup`` a
+    dict ``{name_or_code: index_in_geometries}``. The countries can be
+    designated by their ISO or ADM0 3-letter code (as in the
+    ``country_code3`` column) or by their different names.
+    """
+    countries = load_countries(conf['countries_geometries_path'])
+    geometries = [geometry for keys, geometry in countries]
+    lookup = {}
+    for i, (keys, geometry) in enumerate(countries):
+        for key in keys:
+            lookup.setdefault(key, i)
+    return geometries, lookup
+
+
+@lru_cache(maxsize=1)
+def get_countries_geometries():
+    """Return the dicts ``(name_to_geometry, name_to_extent)``.
+
+    The countries are designated by their codes and by their names (see
+    ``get_countries``).
+    """
+    geometries, lookup = get_countries()
+    name_to_geometry = {
+        name: geometries[index]
+        for name, index in lookup.items()
+    }
+    name_to_extent = {
+        name: geometry.bounds
+        for name, geometry in name_to_geometry.items()
+    }
+    return name_to_geometry, name_to_extent
+
+
+@lru_cache(maxsize=8)
+def get_countries_paths(projection):
+    """Return the Matplotlib paths of the countries geometries (in the order
+    of ``get_countries``) projected in the coordinates of a Cartopy
+    projection. The projection is computed once per projection."""
+    import cartopy.crs as ccrs
+    from matplotlib.path import Path
+    try:
+        from cartopy.mpl.path import shapely_to_path
+    except ImportError:  # Cartopy < 0.25
+        from cartopy.mpl.patch import geos_to_path
+
+        def shapely_to_path(geometry):
+            return Path.make_compound_path(*geos_to_path(geometry))
+    geometries, _ = get_countries()
+    source = ccrs.PlateCarree()
+    return [
+        shapely_to_path(projection.project_geometry(geometry, source))
+        for geometry in geometries
+    ]
+
+
+def init_map(figsize=(12, 8), extent=(-150, 60, -25, 60)):
+    """Initialize a world map with the given dimensions.
+
+    ``figsize`` is the figure's size in inches. ``extent`` is the boundaries
+    of the map, in its own PlateCarree coordinates.
+    """
+    _check_cartopy()
+    import cartopy.crs as ccrs
+    import cartopy.feature
+    import matplotlib.pyplot as plt
+    ax = plt.axes(projection=ccrs.PlateCarree())
+    ax.add_feature(cartopy.feature.LAND)
+    ax.add_feature(cartopy.feature.OCEAN)
+    ax.add_feature(cartopy.feature.COASTLINE)
+    ax.add_feature(cartopy.feature.BORDERS, linestyle='-', alpha=.5)
+
+    ax.set_extent(extent)
+    ax.figure.set_size_inches(figsize)
+    return ax
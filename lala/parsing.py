@@ -0,0 +1,268 @@
+"""Reading and columnar parsing of NGINX access logs."""
+
+import bz2
+import glob
+import gzip
+import lzma
+import os
+import re
+from itertools import islice
+
+import numpy as np
+import pandas
+
+NGINX_LOG_REGEXPR = (r'(.*?) -(.*?) - \[([^\]\n]*)\] "(.*)" (\d+) (\d+) '
+                     r'"(.*)" "(.*)"')
+NGINX_LOG_FIELDS = ('IP', 'stuff', 'date', 'request', 'response', 'status',
+                    'referrer', 'browser')
+NGINX_DATE_FORMAT = '%d/%b/%Y:%H:%M:%S %z'
+REQUEST_REGEXPR = r'[^\S\n]*(\S+)[^\S\n]+(\S+)[^\S\n]+(\S+)[^\S\n]*'
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+          'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+COMPRESSIONS_MAGIC_NUMBERS = [
+    (b'\x1f\x8b', gzip.open),
+    (b'BZh', bz2.open),
+    (b'\xfd7zXZ\x00', lzma.open),
+]
+
+# These match every line, with empty groups when the line is not a log entry
+_NGINX_LINES_REGEXPR = re.compile(
+    r'^(?:%s.*|.*)$' % NGINX_LOG_REGEXPR, re.MULTILINE)
+_REQUEST_REGEXPR = re.compile(
+    r'^(?:%s|.*)$' % REQUEST_REGEXPR, re.MULTILINE)
+
+# Layout of a date such as "01/Dec/2017:12:55:21 +0000"
+_DATE_LENGTH = 26
+_DATE_DIGITS = [0, 1, 7, 8, 9, 10, 12, 13, 15, 16, 18, 19, 22, 23, 24, 25]
+_DATE_SEPARATORS = {2: '/', 6: '/', 11: ':', 14: ':', 17: ':', 20: ' '}
+_MONTH_KEYS = np.array([
+    (ord(m[0]) << 16) + (ord(m[1]) << 8) + ord(m[2]) for m in MONTHS
+])
+_MONTH_ORDER = np.argsort(_MONTH_KEYS)
+
+
+def _digits_to_int(digits, start, end):
+    result = np.zeros(len(digits), dtype='int64')
+    for i in range(start, end):
+        result = 10 * result + digits[:, i]
+    return result
+
+
+def parse_nginx_dates(dates):
+    """Convert NGINX dates to a series of UTC datetimes, vectorially.
+
+    NGINX dates have a fixed width and format (``01/Dec/2017:12:55:21 +0000``)
+    so they are converted to a 2D array of bytes and all date fields are
+    computed with array arithmetics. If some dates do not follow that exact
+    layout, the conversion falls back to ``pandas.to_datetime``.
+    """
+    dates = pandas.Series(dates, dtype=object)
+    chars = None
+    if len(dates) and (dates.str.len() == _DATE_LENGTH).all():
+        try:
+            chars = np.array(dates.values.tolist(),
+                             dtype='S%d' % _DATE_LENGTH)
+        except UnicodeEncodeError:
+            chars = None
+    if chars is None:
+        return pandas.to_datetime(dates, format=NGINX_DATE_FORMAT, utc=True
+                                  ).astype('datetime64[ns, UTC]')
+    chars = chars.view(np.uint8).reshape(-1, _DATE_LENGTH).astype('int64')
+    digits = chars - ord('0')
+    month_keys = (chars[:, 3] << 16) + (chars[:, 4] << 8) + chars[:, 5]
+    month_index = np.searchsorted(_MONTH_KEYS[_MONTH_ORDER], month_keys)
+    month_index = np.minimum(month_index, len(MONTHS) - 1)
+    valid = (
+        (digits[:, _DATE_DIGITS] >= 0).all(axis=1) &
+        (digits[:, _DATE_DIGITS] <= 9).all(axis=1) &
+        (_MONTH_KEYS[_MONTH_ORDER][month_index] == month_keys) &
+        np.isin(chars[:, 21], [ord('+'), ord('-')])
+    )
+    for position, separator in _DATE_SEPARATORS.items():
+        valid &= chars[:, position] == ord(separator)
+    months = (
+        12 * (_digits_to_int(digits, 7, 11) - 1970) +
+        _MONTH_ORDER[month_index]
+    )
+    month_starts = months.astype('datetime64[M]').astype('datetime64[D]')
+    month_lengths = ((months + 1).astype('datetime64[M]')
+                     .astype('datetime64[D]') - month_starts).astype('int64')
+    day, hour, minute, second = [
+        _digits_to_int(digits, start, start + 2) for start in (0, 12, 15, 18)
+    ]
+    # Out-of-range fields (e.g. "32/Dec" or "25:61:61") are left to
+    # pandas.to_datetime, which raises an error
+    valid &= ((day >= 1) & (day <= month_lengths) & (hour < 24) &
+              (minute < 60) & (second < 60))
+    if not valid.all():
+        return pandas.to_datetime(dates, format=NGINX_DATE_FORMAT, utc=True
+                                  ).astype('datetime64[ns, UTC]')
+    offsets = np.where(chars[:, 21] == ord('-'), -1, 1) * (
+        3600 * _digits_to_int(digits, 22, 24) +
+        60 * _digits_to_int(digits, 24, 26)
+    )
+    seconds = (
+        (month_starts + (day - 1)).astype('datetime64[s]').astype('int64') +
+        3600 * hour + 60 * minute + second - offsets
+    )
+    return pandas.Series(pandas.to_datetime(seconds, unit='s', utc=True),
+                         index=dates.index).astype('datetime64[ns, UTC]')
+
+
+def to_utc(date):
+    """Return a UTC ``pandas.Timestamp`` from a date (datetime, string...).
+
+    Dates without timezone are assumed to be UTC.
+    """
+    date = pandas.Timestamp(date)
+    if date.tzinfo is None:
+        return date.tz_localize('UTC')
+    return date.tz_convert('UTC')
+
+
+def dates_to_timestamps(dates):
+    """Return the EPOCH times (in seconds) of a series of UTC datetimes.
+
+    The dates can also be strings (e.g. in weblogs reloaded from a CSV file).
+    """
+    if not pandas.api.types.is_datetime64_any_dtype(dates):
+        dates = pandas.to_datetime(dates, utc=True)
+    epoch = pandas.Timestamp(0, tz='UTC')
+    return (dates - epoch).dt.total_seconds().values
+
+
+def weblogs_timestamps(weblogs):
+    """Return the array of the EPOCH times (in seconds) of weblogs entries.
+
+    The times are taken from the ``timestamp`` column, or computed from the
+    ``parsed_date`` column for weblogs without ``timestamp`` column (such as
+    compact weblogs, see ``lala.schema``).
+    """
+    if 'timestamp' in weblogs.columns:
+        return weblogs['timestamp'].values
+    return dates_to_timestamps(weblogs['parsed_date'])
+
+
+def _findall_lines(regexpr, lines):
+    """Return one tuple of groups per line, using a single regex scan.
+
+    ``regexpr`` must match every line (with empty groups for lines which
+    do not have the expected format), so that the lines are all matched in
+    one ``findall`` over the joined text, instead of one match per line.
+    """
+    if len(lines) == 0:
+        return []
+    text = '\n'.join(lines)
+    if text.count('\n') != len(lines) - 1:
+        lines = [line.rstrip('\n') for line in lines]
+        text = '\n'.join(lines)
+    if text.count('\n') != len(lines) - 1:
+        return [match.groups() for match in map(regexpr.match, lines)]
+    return regexpr.findall(text)
+
+
+def findall_array(regexpr, lines, n_groups):
+    """Return a 2D object array of the regex groups of each line.
+
+    See ``_findall_lines`` for the requirements on ``regexpr``.
+    """
+    rows = _findall_lines(regexpr, lines)
+    return np.array(rows, dtype=object).reshape(-1, n_groups)
+
+
+def parse_nginx_log_lines(log_lines, chunksize=100000):
+    """Parse lines of NGINX logs into a dataframe, with vectorized operations.
+
+    The lines are processed by chunks of ``chunksize`` lines, each chunk being
+    split into fields by a single regular expression scan over the whole
+    chunk, so that no Python dict is created per record. The dates are then
+    converted in bulk with ``parse_nginx_dates``.
+
+    Returns ``(dataframe, errored_lines)`` where ``errored_lines`` is the list
+    of the indices of the lines which could not be parsed. The dataframe has
+    the raw fields (``IP``, ``date``, ``request``, etc.), the ``parsed_date``
+    and ``timestamp`` columns, and the ``method``, ``url`` and ``http``
+    columns obtained by splitting the request.
+    """
+    log_lines = list(log_lines)
+    chunks = []
+    errored_lines = []
+    response_index = NGINX_LOG_FIELDS.index('response')
+    for start in range(0, len(log_lines), chunksize):
+        fields = findall_array(_NGINX_LINES_REGEXPR,
+                                log_lines[start:start + chunksize],
+                                len(NGINX_LOG_FIELDS))
+        matched = fields[:, response_index] != ''
+        errored_lines.extend((start + (~matched).nonzero()[0]).tolist())
+        chunks.append(fields[matched])
+    if len(chunks):
+        fields = np.concatenate(chunks)
+    else:
+        fields = np.zeros((0, len(NGINX_LOG_FIELDS)), dtype=object)
+    records = pandas.DataFrame({
+        name: fields[:, i]
+        for i, name in enumerate(NGINX_LOG_FIELDS)
+    }, columns=NGINX_LOG_FIELDS)
+    records['parsed_date'] = parse_nginx_dates(records['date'])
+    records['timestamp'] = dates_to_timestamps(records['parsed_date'])
+    request_fields = findall_array(_REQUEST_REGEXPR, fields[:, 3], 3)
+    request_fields[request_fields[:, 0] == ''] = None
+    for i, name in enumerate(['method', 'url', 'http']):
+        records[name] = request_fields[:, i]
+    return records, errored_lines
+
+
+def iter_file_lines(fileobj):
+    """Yield the lines of a text file, without their line breaks.
+
+    The lines are the same as in ``fileobj.read().split("\\n")`` (in
+    particular the last line is empty when the file ends with a line break)
+    but the file content is never entirely loaded in memory.
+    """
+    line = ''
+    for line in fileobj:
+        yield line[:-1] if line.endswith('\n') else line
+    if line == '' or line.endswith('\n'):
+        yield ''
+
+
+def iter_chunks(iterable, chunksize):
+    """Yield successive lists of (at most) ``chunksize`` elements."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, chunksize))
+        if len(chunk) == 0:
+            return
+        yield chunk
+
+
+def open_log_file(filepath):
+    """Open a log file in text mode, decompressing it on the fly if needed.
+
+    Gzip, Bzip2 and XZ compressions are detected from the first bytes of the
+    file (not from its extension), so that rotated logs such as
+    ``access.log.2.gz`` or ``access.log.1`` are transparently read. The
+    decompression is streamed: the file is never entirely in memory.
+    """
+    with open(filepath, 'rb') as f:
+        header = f.read(6)
+    for magic_number, open_function in COMPRESSIONS_MAGIC_NUMBERS:
+        if header.startswith(magic_number):
+            return open_function(filepath, 'rt')
+    return open(filepath, 'r')
+
+
+def find_log_files(path):
+    """Return the sorted list of log files designated by ``path``.
+
+    ``path`` can be a directory (all files in the directory are returned),
+    a glob pattern such as ``/var/log/nginx/access.log*``, or a single file.
+    """
+    if os.path.isdir(path):
+        filepaths = [os.path.join(path, name) for name in os.listdir(path)]
+    elif any(character in path for character in '*?['):
+        filepaths = glob.glob(path)
+    else:
+        filepaths = [path]
+    return sorted(f for f in filepaths if os.path.isfile(f))
@@ -0,0 +1,184 @@
+"""Charts of weblogs drawn from precomputed counts.
+
+These functions only draw: the counts are computed either from the raw
+entries (by the plotting methods of ``WebLogs``) or from pre-aggregated
+counts (by the plotting methods of ``lala.rollups.RollupCube``).
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pandas
+
+from .maps import _check_cartopy, get_countries, get_countries_paths, init_map
+
+DAY = 24 * 60 * 60
+
+
+def plot_piechart(counts, ax=None):
+    """Plot a pie chart of a series of counts, return the Matplotlib ax."""
+    import matplotlib.pyplot as plt
+    counts = counts[counts > 0]
+    if ax is None:
+        fig, ax = plt.subplots(1)
+    ax = counts.plot(kind='pie', ax=ax)
+    ax.set_aspect('equal')
+    ax.set_ylabel('')
+    return ax
+
+
+def plot_timeline(timestamps, weights=None, bins_per_day=4, ax=None):
+    """Plot the histogram of timestamps (in seconds), return the ax.
+
+    ``weights`` is an optional array of the number of hits at each timestamp
+    (e.g. the counts of the time buckets of a rollup cube).
+    """
+    import matplotlib.pyplot as plt
+    mini, maxi = timestamps.min(), timestamps.max()
+    bins = max(1, int(bins_per_day * (maxi - mini) / DAY))
+    if ax is None:
+        fig, ax = plt.subplots(1, figsize=(12, 3))
+    ax.hist(timestamps, bins=bins, weights=weights, alpha=0.6)
+    x_ticks = ax.get_xticks()
+    xlabels = [datetime.fromtimestamp(int(x)).strftime('%Y-%m-%d')
+               for x in x_ticks]
+    ax.set_xticklabels(xlabels, rotation=45)
+    ax.set_xlim(mini, maxi)
+    ax.set_ylabel('occurences')
+    return ax
+
+
+def countries_colormap(country_values, mini='auto', maxi='auto', ax=None):
+    """Plot a colormap of different countries, return the Matplotlib ax.
+
+    Parameters
+    ----------
+    country_values
+      A series of values (e.g. numbers of hits) indexed by country name.
+
+    mini, maxi
+      Extreme values leading to read or white colors. Leave to auto to adjust
+      this range to the values of country_values.
+
+    ax
+      A Matplotlib ax with a representation of the world. If None, one is
+      created automatically
+    """
+    _check_cartopy()
+    from matplotlib import cm
+    from matplotlib.collections import PatchCollection
+    from matplotlib.patches import PathPatch
+    _, lookup = get_countries()
+    country_values = country_values[country_values > 0]
+    values = country_values.values
+    if mini == 'auto':
+        mini = values.min()
+    if maxi == 'auto':
+        maxi = values.max()
+    values = (values - mini) / ((maxi - mini) or 1)
+    indices = np.array([lookup.get(country, -1)
+                        for country in country_values.index], dtype=int)
+    known = indices >= 0
+
+    if ax is None:
+        ax = init_map(figsize=(12, 8), extent=(-150, 60, -25, 60))
+    paths = get_countries_paths(ax.projection)
+    collection = PatchCollection(
+        [PathPatch(paths[index]) for index in indices[known]],
+        facecolors=cm.YlOrBr(values[known]), edgecolors='none',
+        transform=ax.transData)
+    ax.add_collection(collection, autolim=False)
+    return ax
+
+
+def bin_positions(positions_counts, resolution=1.0):
+    """Sum the counts of (longitude, latitude) positions in a grid.
+
+    The positions are replaced by the center of their cell in a grid of
+    ``resolution`` degrees. Returns a series of counts indexed by the
+    (longitude, latitude) of the centers of the non-empty cells.
+    """
+    longitudes, latitudes = [
+        (np.floor(positions_counts.index.get_level_values(i).values /
+                  resolution) + 0.5) * resolution
+        for i in (0, 1)
+    ]
+    binned = positions_counts.groupby([longitudes, latitudes], sort=False)
+    return binned.sum()
+
+
+def plot_geo_positions(positions_counts, country_values=None, ax=None,
+                       max_points=1000, resolution=None, hexbin=False):
+    """Plot circles on a map around positions, return the Matplotlib ax.
+
+    Parameters
+    ----------
+
+    positions_counts
+      A series of numbers of hits indexed by (longitude, latitude).
+
+    country_values
+      Optional series of values indexed by country name, drawn as a
+      colormap of the countries (see ``countries_colormap``).
+
+    ax
+      Matplotlib ax with a representation of the world.
+
+    max_points
+      Maximal number of circles drawn (the positions with the most hits are
+      drawn first). None for no limit.
+
+    resolution
+      If provided, the positions are first grouped in cells of this size, in
+      degrees (see ``bin_positions``).
+
+    hexbin
+      If True, the hits are drawn as a hexagonal heatmap instead of circles,
+      with hexagons of ``resolution`` degrees (default 2).
+    """
+    _check_cartopy()
+    import cartopy.crs as ccrs
+    if ax is None:
+        ax = init_map(figsize=(12, 8), extent=(-150, 60, -25, 60))
+    if country_values is not None:
+        countries_colormap(country_values, mini='auto', maxi='auto', ax=ax)
+
+    index = positions_counts.index
+    longitudes = np.asarray(index.get_level_values(0), dtype='float64')
+    latitudes = np.asarray(index.get_level_values(1), dtype='float64')
+    counts = np.asarray(positions_counts.values, dtype='float64')
+    selected = ~(np.isnan(longitudes) | np.isnan(latitudes)) & (counts > 0)
+    longitudes = longitudes[selected]
+    latitudes = latitudes[selected]
+    counts = counts[selected]
+    if len(counts) == 0:
+        return ax
+    if hexbin:
+        resolution = 2.0 if resolution is None else resolution
+        gridsize = (int(np.ceil(360 / resolution)),
+                    int(np.ceil(180 / resolution / np.sqrt(3))))
+        ax.hexbin(longitudes, latitudes, C=counts, reduce_C_function=np.sum,
+                  gridsize=gridsize, extent=(-180, 180, -90, 90), mincnt=1,
+                  cmap='YlOrRd', alpha=0.8, zorder=2000,
+                  transform=ccrs.PlateCarree())
+        return ax
+    if resolution is not None:
+        binned = bin_positions(pandas.Series(
+            counts, index=pandas.MultiIndex.from_arrays([longitudes,
+                                                         latitudes])),
+            resolution=resolution)
+        longitudes, latitudes = [np.asarray(binned.index.get_level_values(i))
+                                 for i in (0, 1)]
+        counts = binned.values
+    if (max_points is not None) and (len(counts) > max_points):
+        top = np.argpartition(-counts, max_points - 1)[:max_points]
+        longitudes, latitudes, counts = [
+            array[top] for array in (longitudes, latitudes, counts)
+        ]
+    # The largest circles are drawn first, below the smaller ones.
+    order = np.argsort(-counts, kind='mergesort')
+    sizes = np.maximum(5, 600 * counts[order] / counts.max())
+    ax.scatter(longitudes[order], latitudes[order], c='w', s=sizes,
+               zorder=2000, linewidths=2, edgecolor='k',
+               transform=ccrs.Geodetic())
+    return ax
@@ -0,0 +1,274 @@
+"""Aggregations of web logs which can be computed chunk by chunk.
+
+A reducer is fed successive chunks of weblogs with ``update(weblogs)``, and
+only keeps a compact state (counts, histograms...) so that logs too large to
+fit in memory can be aggregated. Reducers computed on different logs (other
+files, other hosts) can be combined with ``merge(other_reducer)``. The final
+aggregation is obtained with ``result()``.
+
+The reducers based on sketches (``DistinctCountReducer``,
+``TopValuesReducer``, ``QuantilesReducer``, see ``lala.sketches``) give
+approximate results but their memory is bounded whatever the number of
+different IPs, urls, etc. in the logs.
+"""
+
+import numpy as np
+import pandas
+
+from .parsing import weblogs_timestamps
+from .sketches import HyperLogLog, SpaceSaving, TDigest
+
+
+class Reducer:
+    """Base class for the aggregations computed chunk by chunk."""
+
+    def update(self, weblogs):
+        """Update the state of the reducer with a chunk of weblogs."""
+        raise NotImplementedError()
+
+    def merge(self, other):
+        """Add the state of another reducer of the same kind to this one."""
+        raise NotImplementedError()
+
+    def result(self):
+        """Return the aggregation for all the weblogs seen so far."""
+        raise NotImplementedError()
+
+
+def _add_counts(counts, other_counts):
+    return counts.add(other_counts, fill_value=0).astype('int64')
+
+
+def _max_timestamps(timestamps, other_timestamps):
+    timestamps = pandas.concat([timestamps, other_timestamps])
+    return timestamps.groupby(level=0).max()
+
+
+class CountsReducer(Reducer):
+    """Count the occurences of the different values of a column.
+
+    For instance ``CountsReducer('country_name')`` counts the hits per
+    country and ``CountsReducer('IP')`` counts the hits per IP. The result is
+    the same as ``weblogs[column].value_counts()``.
+    """
+
+    def __init__(self, column):
+        self.column = column
+        self.counts = pandas.Series([], dtype='int64')
+
+    def update(self, weblogs):
+        self.counts = _add_counts(self.counts,
+                                  weblogs[self.column].value_counts())
+
+    def merge(self, other):
+        self.counts = _add_counts(self.counts, other.counts)
+
+    def result(self):
+        return self.counts.sort_values(ascending=False)
+
+
+class TimelineReducer(Reducer):
+    """Count the hits in time bins of fixed duration.
+
+    The bins are aligned on the EPOCH so that the counts of different chunks
+    (or different logs) can be added. The result is a series of counts
+    indexed by the (UTC) start time of each bin, with empty bins included.
+    """
+
+    def __init__(self, bins_per_day=4):
+        self.bins_per_day = bins_per_day
+        self.bin_duration = 24 * 60 * 60 / bins_per_day
+        self.counts = pandas.Series([], dtype='int64')
+
+    def update(self, weblogs):
+        bins = np.floor(weblogs_timestamps(weblogs) / self.bin_duration)
+        self.counts = _add_counts(
+            self.counts, pandas.Series(bins.astype('int64')).value_counts())
+
+    def merge(self, other):
+        self.counts = _add_counts(self.counts, other.counts)
+
+    def result(self):
+        if len(self.counts) == 0:
+            bins = np.arange(0)
+        else:
+            bins = np.arange(self.counts.index.min(),
+                             self.counts.index.max() + 1)
+        counts = self.counts.reindex(bins, fill_value=0)
+        counts.index = pandas.to_datetime(bins * self.bin_duration,
+                                          unit='s', utc=True)
+        return counts
+
+
+class VisitsReducer(Reducer):
+    """Count the visits of each visitor.
+
+    Consecutive hits of a visitor belong to the same visit if they are less
+    than ``max_visits_interval`` seconds apart, as in
+    ``WebLogs.visitors_and_visits``. The chunks are expected in chronological
+    order: the time of the last hit of each visitor is kept so that visits
+    overlapping two chunks are only counted once. The result is a series of
+    numbers of visits indexed by visitor (the ``per`` column).
+    """
+
+    def __init__(self, max_visits_interval=60, per='IP'):
+        self.max_visits_interval = max_visits_interval
+        self.per = per
+        self.n_visits = pandas.Series([], dtype='int64')
+        self.last_timestamps = pandas.Series([], dtype='float64')
+
+    def update(self, weblogs):
+        hits = pandas.DataFrame({
+            'visitor': np.asarray(weblogs[self.per], dtype=object),
+            'timestamp': weblogs_timestamps(weblogs)
+        }).dropna(subset=['visitor'])
+        hits = hits.sort_values(['visitor', 'timestamp'], kind='mergesort')
+        visitors = hits['visitor'].values
+        timestamps = hits['timestamp'].values
+        if len(visitors) == 0:
+            return
+        is_first_hit = np.ones(len(visitors), dtype=bool)
+        is_first_hit[1:] = visitors[1:] != visitors[:-1]
+        previous_timestamps = np.roll(timestamps, 1)
+        previous_timestamps[is_first_hit] = self.last_timestamps.reindex(
+            visitors[is_first_hit]).values
+        new_visits = ~(timestamps - previous_timestamps <
+                       self.max_visits_interval)
+        self.n_visits = _add_counts(
+            self.n_visits, pandas.Series(new_visits).groupby(visitors).sum())
+        is_last_hit = np.roll(is_first_hit, -1)
+        self.last_timestamps = _max_timestamps(
+            self.last_timestamps,
+            pandas.Series(timestamps[is_last_hit],
+                          index=visitors[is_last_hit]))
+
+    def merge(self, other):
+        """Add the visits of another reducer (assumed to be disjoint)."""
+        self.n_visits = _add_counts(self.n_visits, other.n_visits)
+        self.last_timestamps = _max_timestamps(self.last_timestamps,
+                                               other.last_timestamps)
+
+    def result(self):
+        return self.n_visits.sort_values(ascending=False)
+
+
+class DistinctCountReducer(Reducer):
+    """Estimate the number of distinct values of a column (HyperLogLog).
+
+    For instance ``DistinctCountReducer('IP')`` estimates the number of
+    unique visitors, ``DistinctCountReducer('IP', per='country_name')`` the
+    number of unique visitors of each country, and
+    ``DistinctCountReducer('IP', bins_per_day=1)`` the number of unique
+    visitors of each (UTC) day. Each group uses ``2 ** precision`` bytes
+    and the relative error is about ``1.04 / sqrt(2 ** precision)``.
+
+    The result is the estimated number of distinct values, or a series of
+    numbers indexed by group (the start time of the bin, and/or the value of
+    the ``per`` column).
+    """
+
+    def __init__(self, column='IP', per=None, bins_per_day=None,
+                 precision=12):
+        self.column = column
+        self.per = per
+        self.bins_per_day = bins_per_day
+        if bins_per_day is not None:
+            self.bin_duration = 24 * 60 * 60 / bins_per_day
+        self.precision = precision
+        self.sketches = {}
+
+    def _sketch(self, group):
+        if group not in self.sketches:
+            self.sketches[group] = HyperLogLog(precision=self.precision)
+        return self.sketches[group]
+
+    def update(self, weblogs):
+        keys = []
+        if self.bins_per_day is not None:
+            bins = np.floor(weblogs_timestamps(weblogs) / self.bin_duration)
+            keys.append(bins.astype('int64'))
+        if self.per is not None:
+            keys.append(np.asarray(weblogs[self.per], dtype=object))
+        values = np.asarray(weblogs[self.column], dtype=object)
+        if len(keys) == 0:
+            self._sketch(None).update(values)
+            return
+        positions = pandas.Series(np.arange(len(values)))
+        groups = positions.groupby(keys[0] if len(keys) == 1 else keys)
+        for group, indices in groups.indices.items():
+            self._sketch(group).update(values[indices])
+
+    def merge(self, other):
+        for group, sketch in other.sketches.items():
+            self._sketch(group).merge(sketch)
+
+    def _group_label(self, group):
+        if self.bins_per_day is None:
+            return group
+        if self.per is None:
+            group = (group,)
+        start = pandas.Timestamp(group[0] * self.bin_duration, unit='s',
+                                 tz='UTC')
+        return start if self.per is None else (start, group[1])
+
+    def result(self):
+        if (self.per is None) and (self.bins_per_day is None):
+            return self._sketch(None).count()
+        groups = list(self.sketches)
+        labels = [self._group_label(group) for group in groups]
+        if (self.per is not None) and (self.bins_per_day is not None):
+            index = pandas.MultiIndex.from_tuples(labels)
+        else:
+            index = pandas.Index(labels)
+        counts = [self.sketches[group].count() for group in groups]
+        return pandas.Series(counts, index=index, dtype='int64').sort_index()
+
+
+class TopValuesReducer(Reducer):
+    """Find the most frequent values of a column (Space-Saving summary).
+
+    For instance ``TopValuesReducer('referrer', capacity=1000)`` finds the
+    top referrers while counting at most 1000 different referrers. The
+    result is a series of estimated counts (sorted by decreasing count),
+    which can over-estimate the true counts by at most ``self.sketch.errors``.
+    The counts of the top values are exact when the values are much more
+    frequent than the others.
+    """
+
+    def __init__(self, column, capacity=1000):
+        self.column = column
+        self.sketch = SpaceSaving(capacity=capacity)
+
+    def update(self, weblogs):
+        self.sketch.update(weblogs[self.column])
+
+    def merge(self, other):
+        self.sketch.merge(other.sketch)
+
+    def result(self):
+        return self.sketch.counts
+
+
+class QuantilesReducer(Reducer):
+    """Estimate quantiles of a numeric column (t-digest).
+
+    For instance ``QuantilesReducer('status', quantiles=[0.5, 0.99])``
+    estimates the median and 99th percentile of the response sizes (in
+    bytes). The result is a series of values indexed by quantile.
+    """
+
+    def __init__(self, column='status', quantiles=(0.5, 0.9, 0.99),
+                 compression=200):
+        self.column = column
+        self.quantiles = list(quantiles)
+        self.sketch = TDigest(compression=compression)
+
+    def update(self, weblogs):
+        self.sketch.update(weblogs[self.column])
+
+    def merge(self, other):
+        self.sketch.merge(other.sketch)
+
+    def result(self):
+        return pandas.Series(self.sketch.quantile(self.quantiles),
+                             index=self.quantiles)
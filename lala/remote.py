@@ -0,0 +1,220 @@
+"""Streaming of log files from remote hosts (through SSH).
+
+The remote files are read with a command such as ``cat access.log`` (or
+``tail -c +N access.log`` to resume from byte N, optionally compressed by
+``gzip -c`` before the transfer) run by a *transport*: a function returning
+the command line which runs a shell command on the host, by default through
+``ssh user@host``. The output is streamed, never entirely held in memory.
+"""
+
+from contextlib import contextmanager
+import gzip
+import io
+import os
+import shlex
+import shutil
+from signal import SIGPIPE
+import subprocess as sp
+import tempfile
+
+from .conf import conf
+from .parsing import iter_file_lines
+
+
+def ssh_transport(host='localhost', user='root', ssh_options=()):
+    """Return a transport running shell commands on a host through SSH.
+
+    ``ssh_options`` is a list of extra arguments for the ``ssh`` command.
+    """
+    def transport(command):
+        return ['ssh'] + list(ssh_options) + ['%s@%s' % (user, host), command]
+    return transport
+
+
+def multiplexed_ssh_transport(host='localhost', user='root',
+                              control_directory=None, persist=600):
+    """Return an SSH transport reusing a persistent connection to the host.
+
+    The first command opens a master connection (OpenSSH's ControlMaster)
+    which stays open ``persist`` seconds after the last command, and the
+    next commands to the same host go through that connection, without new
+    handshakes. The connection sockets are in ``control_directory``, by
+    default ``conf['ssh_control_directory']`` (``~/.ssh``), which must only
+    be accessible to the user (an ``IOError`` is raised otherwise). It is
+    created if it does not exist.
+    """
+    if control_directory is None:
+        control_directory = conf['ssh_control_directory']
+    os.makedirs(control_directory, mode=0o700, exist_ok=True)
+    if os.stat(control_directory).st_mode & 0o077:
+        raise IOError("The SSH control directory %s must only be accessible "
+                      "to the user (e.g. chmod 700)." % control_directory)
+    control_path = os.path.join(control_directory, 'lala-ssh-%C')
+    ssh_options = ['-o', 'ControlMaster=auto',
+                   '-o', 'ControlPath=%s' % control_path,
+                   '-o', 'ControlPersist=%d' % persist]
+    return ssh_transport(host=host, user=user, ssh_options=ssh_options)
+
+
+def local_transport(command):
+    """Transport running the shell commands locally (e.g. for tests)."""
+    return ['sh', '-c', command]
+
+
+def remote_read_command(filename, offset=0, compress=False):
+    """Return the shell command printing a file from a byte offset.
+
+    If ``compress`` is True the output is compressed with ``gzip -c``.
+    """
+    if offset > 0:
+        command = 'tail -c +%d %s' % (offset + 1, shlex.quote(filename))
+    else:
+        command = 'cat %s' % shlex.quote(filename)
+    if compress:
+        command += ' | gzip -c'
+    return command
+
+
+@contextmanager
+def open_remote_file(filename='/var/log/nginx/access.log', host='localhost',
+                     user='root', offset=0, compress=False, transport=None):
+    """Open a remote file as a (decompressed) binary stream.
+
+    To be used as a context manager. If the content of the file has not been
+    read entirely when the context exits, the transfer is interrupted.
+
+    Parameters
+    ----------
+
+    filename
+      Path to the file in the host machine.
+
+    host
+      IP address or domain name of the host.
+
+    user
+      Username on the host.
+
+    offset
+      Number of bytes of the file to skip (e.g. already downloaded).
+
+    compress
+      If True, the file is compressed on the host before the transfer, and
+      decompressed on the fly.
+
+    transport
+      Function ``shell_command => command_line`` (see ``ssh_transport``),
+      by default SSH to ``user@host``.
+
+    Examples
+    --------
+
+    >>> with open_remote_file('/var/log/nginx/access.log', host='myhost.org',
+    >>>                       compress=True) as f:
+    >>>     first_bytes = f.read(1000)
+    """
+    if transport is None:
+        transport = ssh_transport(host=host, user=user)
+    command_line = transport(remote_read_command(filename, offset=offset,
+                                                 compress=compress))
+    # stderr goes to a file, as a full stderr pipe would block the process
+    with tempfile.TemporaryFile() as stderr:
+        process = sp.Popen(command_line, stdout=sp.PIPE, stderr=stderr)
+        stream = process.stdout
+        if compress:
+            stream = gzip.GzipFile(fileobj=process.stdout, mode='rb')
+        try:
+            yield stream
+        finally:
+            # If the output was not entirely read, this stops the process
+            # with a SIGPIPE, which is not reported as an error.
+            process.stdout.close()
+            returncode = process.wait()
+        stderr.seek(0)
+        error = stderr.read()
+        if len(error) and (returncode not in (-SIGPIPE, 128 + SIGPIPE)):
+            raise IOError(error)
+
+
+def iter_remote_file_lines(filename='/var/log/nginx/access.log',
+                           host='localhost', user='root', offset=0,
+                           compress=False, transport=None, encoding='utf8'):
+    """Yield the lines of a remote file as they are received.
+
+    The lines are the same as with ``content.split("\\n")``. The lines can
+    be fed directly to ``WebLogs.iter_nginx_weblogs(log_lines=...)``. See
+    ``open_remote_file`` for the parameters.
+    """
+    with open_remote_file(filename=filename, host=host, user=user,
+                          offset=offset, compress=compress,
+                          transport=transport) as stream:
+        text_stream = io.TextIOWrapper(stream, encoding=encoding,
+                                       errors='replace', newline='\n')
+        yield from iter_file_lines(text_stream)
+
+
+def get_remote_file_content(filename='/var/log/nginx/access.log',
+                            host='localhost', user='root', decode='utf8',
+                            target=None, compress=False, offset=0,
+                            resume=False, transport=None,
+                            return_content=True):
+    """Return the content of a file on a remote host (and/or write it to a
+    local file).
+
+    Parameters
+    ----------
+
+    filename
+      path to the file in the host machine
+
+    host
+      IP address or domain name of the host.
+
+    user
+      Username on the host.
+
+    decode
+      If not None, the file content received from the server will be
+      decoded into a string using this format.
+
+    target
+      If provided, the content is streamed to this local file, then read
+      from that file and returned (see ``return_content``).
+
+    compress
+      If True, the file is compressed (gzip) on the host for the transfer.
+
+    offset
+      Number of bytes to skip at the beginning of the file.
+
+    resume
+      If True and the ``target`` file exists, only the remote bytes after the
+      size of the target are downloaded and appended to the target.
+
+    transport
+      Function ``shell_command => command_line`` running commands on the
+      host (see ``ssh_transport``), by default SSH to ``user@host``.
+
+    return_content
+      If False and a ``target`` is provided, None is returned, so that the
+      content is never entirely in memory.
+    """
+    mode = 'wb'
+    if (target is not None) and resume and os.path.exists(target):
+        offset, mode = os.path.getsize(target), 'ab'
+    with open_remote_file(filename=filename, host=host, user=user,
+                          offset=offset, compress=compress,
+                          transport=transport) as stream:
+        if target is None:
+            content = stream.read()
+        else:
+            with open(target, mode) as f:
+                shutil.copyfileobj(stream, f)
+    if target is not None:
+        if not return_content:
+            return None
+        with open(target, 'rb') as f:
+            content = f.read()
+    if decode is not None:
+        content = content.decode(decode)
+    return content
@@ -0,0 +1,197 @@
+"""Generation of reports from Pug templates, one at a time or in batches.
+
+This requires the PDF Reports library. The templates are compiled the first
+time they are used in a process, then reused for all the reports of that
+process. In a batch (see ``write_reports``), the weblogs and the shared
+aggregations are sent once to each worker process, then each worker selects
+the entries of a report, renders its figures and writes its file, so that
+the reports are written as they are finished.
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+import os
+
+import proglog
+
+PUG_EXTENSION = 'pypugjs.ext.jinja.PyPugJSExtension'
+_worker_state = {}
+
+
+@lru_cache(maxsize=32)
+def _template_environment(directory):
+    import jinja2
+    return jinja2.Environment(loader=jinja2.FileSystemLoader(directory),
+                              extensions=[PUG_EXTENSION])
+
+
+@lru_cache(maxsize=32)
+def _string_template(template_string):
+    import jinja2
+    loader = jinja2.DictLoader({'template.pug': template_string})
+    environment = jinja2.Environment(loader=loader,
+                                     extensions=[PUG_EXTENSION])
+    return environment.get_template('template.pug')
+
+
+def get_template(template_path=None, template_string=None):
+    """Return the compiled Jinja template of a Pug template (file or string).
+
+    The compiled templates are cached, and the templates files are compiled
+    again only if they were modified.
+    """
+    if template_string is not None:
+        return _string_template(template_string)
+    directory, filename = os.path.split(os.path.abspath(template_path))
+    return _template_environment(directory).get_template(filename)
+
+
+def report_to_html(template_path=None, template_string=None, **context):
+    """Return the HTML of a Pug template (file or string) with a context.
+
+    Same as ``pdf_reports.pug_to_html`` (with the same default variables such
+    as ``pdf_tools``), but the template is only compiled once per process.
+    """
+    from pdf_reports import GLOBALS
+    full_context = dict(GLOBALS)
+    full_context.update(context)
+    template = get_template(template_path=template_path,
+                            template_string=template_string)
+    return template.render(full_context)
+
+
+@lru_cache(maxsize=8)
+def _preload_stylesheets(stylesheets):
+    from pdf_reports import preload_stylesheet
+    return [
+        preload_stylesheet(stylesheet) if isinstance(stylesheet, str)
+        else stylesheet
+        for stylesheet in stylesheets
+    ]
+
+
+def write_html_report(html, target, stylesheets=()):
+    """Write a report's HTML as a PDF, or as HTML if the target ends with
+    ``.html``. The stylesheets are only parsed once per process."""
+    if target.lower().endswith('.html'):
+        with open(target, 'w') as f:
+            f.write(html)
+        return
+    from pdf_reports import write_report
+    write_report(html, target=target,
+                 extra_stylesheets=_preload_stylesheets(tuple(stylesheets)))
+
+
+def select_entries(weblogs, filters=None):
+    """Return the entries of weblogs selected by a dict of filters.
+
+    The ``start`` and ``end`` filters restrict the entries to a period (see
+    ``WebLogs.entries_between``), and other filters such as
+    ``{'host': 'front1'}`` or ``{'country_name': ['France', 'Spain']}``
+    select the entries with these values in a column.
+    """
+    filters = dict(filters or {})
+    start, end = filters.pop('start', None), filters.pop('end', None)
+    if (start is not None) or (end is not None):
+        weblogs = weblogs.entries_between(start=start, end=end)
+    for column, values in filters.items():
+        if isinstance(values, (str, int, float)):
+            values = [values]
+        weblogs = weblogs[weblogs[column].isin(values)]
+    return weblogs
+
+
+def _write_batch_report(report, weblogs, template_path, template_string,
+                        shared_context, stylesheets):
+    context = dict(shared_context)
+    context.update(report.get('context', {}))
+    html = report_to_html(
+        template_path=report.get('template_path', template_path),
+        template_string=report.get('template_string', template_string),
+        weblogs=select_entries(weblogs, report.get('filters')), **context)
+    write_html_report(html, report['target'], stylesheets=stylesheets)
+    # The figures of the report are not needed anymore.
+    import matplotlib.pyplot as plt
+    plt.close('all')
+
+
+def _init_worker(state):
+    _worker_state.update(state)
+
+
+def _write_worker_report(report):
+    _write_batch_report(report, **_worker_state)
+
+
+def write_reports(weblogs, reports, template_path=None, template_string=None,
+                  shared_aggregations=None, stylesheets=(), n_jobs=None,
+                  logger='bar'):
+    """Write a batch of reports on different selections of the weblogs.
+
+    Parameters
+    ----------
+
+    weblogs
+      The weblogs from which the entries of each report are selected.
+
+    reports
+      A list of dicts describing each report, with keys ``target`` (path of
+      the PDF file, or of a HTML file if it ends with ``.html``), and
+      optionally ``filters`` (see ``select_entries``), ``context`` (a dict of
+      variables for the template), and ``template_path`` or
+      ``template_string`` to override the template of the batch.
+
+    template_path, template_string
+      The Pug template of the reports, as a file or string. In the template,
+      ``weblogs`` is the selection of entries of the report.
+
+    shared_aggregations
+      A dict ``{name: function}`` of functions ``weblogs => aggregation``
+      which are computed once on all the weblogs, and whose results are
+      variables of every report's template (e.g. ``{'cube': lambda w:
+      w.rollup_cube()}``).
+
+    stylesheets
+      Paths to extra CSS files. They are parsed once per process.
+
+    n_jobs
+      Number of processes writing reports in parallel. Defaults to the
+      number of CPUs. With ``n_jobs=1`` the reports are written one after
+      the other in the current process.
+
+    logger
+      Either 'bar' for a progress bar, None, or any proglog logger.
+
+    Returns a dict ``{target: exception}`` of the reports which could not be
+    written (the other reports are written even when some fail).
+    """
+    logger = proglog.default_bar_logger(logger)
+    shared_context = {
+        name: aggregation(weblogs)
+        for name, aggregation in (shared_aggregations or {}).items()
+    }
+    state = dict(weblogs=weblogs, template_path=template_path,
+                 template_string=template_string,
+                 shared_context=shared_context,
+                 stylesheets=tuple(stylesheets))
+    errors = {}
+    logger(report__total=len(reports), report__index=0)
+    if n_jobs == 1:
+        for i, report in enumerate(reports):
+            try:
+                _write_batch_report(report, **state)
+            except Exception as error:
+                errors[report['target']] = error
+            logger(report__index=i + 1)
+        return errors
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                             initargs=(state,)) as executor:
+        futures = {
+            executor.submit(_write_worker_report, report): report['target']
+            for report in reports
+        }
+        for i, future in enumerate(as_completed(futures)):
+            if future.exception() is not None:
+                errors[futures[future]] = future.exception()
+            logger(report__index=i + 1)
+    return errors
@@ -0,0 +1,258 @@
+"""Rollup cubes: hit counts pre-aggregated per time bucket and dimensions.
+
+A cube is a compact table with one row per combination of (time bucket,
+country, response, method, host...) present in the weblogs, and the number
+of hits of that combination. Once computed, the cube can be rolled up (hits
+per country, per day, per response and country...) and sliced (a period, a
+country...) without going through the raw entries, and the charts of
+``WebLogs`` can be drawn from it. A cube is a reducer (see
+``lala.reducers``) so it can be computed chunk by chunk and merged.
+"""
+
+from collections import OrderedDict
+import json
+
+import numpy as np
+import pandas
+
+from . import plots
+from .parsing import weblogs_timestamps, to_utc
+from .reducers import Reducer
+from .schema import compact_dataframe
+from .store import _check_pyarrow
+
+DEFAULT_DIMENSIONS = ('country_name', 'country_code3', 'latitude',
+                      'longitude', 'response', 'method', 'host')
+_METADATA_KEY = b'lala_rollup_cube'
+
+
+class RollupCube(Reducer):
+    """Numbers of hits per time bucket and per combination of dimensions.
+
+    Parameters
+    ----------
+
+    bucket_duration
+      Duration of the time buckets, in seconds (default is one hour). The
+      buckets are aligned on the EPOCH so that cubes computed on different
+      logs can be merged.
+
+    dimensions
+      Columns of the weblogs on which the hits are counted. The dimensions
+      absent from the first weblogs fed to the cube are ignored (e.g.
+      ``host``, which is only present in multi-host weblogs).
+
+    Examples
+    --------
+
+    >>> cube = weblogs.rollup_cube(bucket_duration=3600)
+    >>> cube.rollup(['country_name'])  # hits per country
+    >>> cube.rollup(['time'], bucket_duration=24 * 3600)  # hits per day
+    >>> uk_december = cube.slice(start='2017-12-01', end='2018-01-01',
+    >>>                          country_name='United Kingdom')
+    >>> uk_december.plot_piechart('method')
+    """
+
+    def __init__(self, bucket_duration=3600, dimensions=DEFAULT_DIMENSIONS):
+        self.bucket_duration = bucket_duration
+        self.dimensions = list(dimensions)
+        self.counts = None
+
+    def _columns(self):
+        return ['bucket'] + self.dimensions + ['hits']
+
+    def _add_counts(self, counts):
+        counts = counts.reindex(columns=self._columns())
+        if self.counts is not None:
+            counts = pandas.concat([self.counts, counts], ignore_index=True,
+                                   sort=False)
+        keys = ['bucket'] + self.dimensions
+        counts = counts.groupby(keys, sort=True, observed=True, dropna=False)
+        self.counts = compact_dataframe(counts['hits'].sum().reset_index())
+
+    def update(self, weblogs):
+        if self.counts is None:
+            self.dimensions = [
+                d for d in self.dimensions if d in weblogs.columns
+            ]
+        buckets = np.floor(weblogs_timestamps(weblogs) / self.bucket_duration)
+        columns = OrderedDict([('bucket', buckets.astype('int64'))])
+        for dimension in self.dimensions:
+            if dimension in weblogs.columns:
+                columns[dimension] = np.asarray(weblogs[dimension])
+            else:
+                columns[dimension] = np.full(len(weblogs), np.nan)
+        columns['hits'] = np.ones(len(weblogs), dtype='int64')
+        self._add_counts(pandas.DataFrame(columns))
+
+    def merge(self, other):
+        """Add the hits of another cube (with the same bucket duration)."""
+        if other.bucket_duration != self.bucket_duration:
+            raise ValueError('Cannot merge cubes with different bucket '
+                             'durations (%s and %s).' % (
+                                 self.bucket_duration, other.bucket_duration))
+        if self.counts is None:
+            self.dimensions = list(other.dimensions)
+        if other.counts is not None:
+            self._add_counts(other.counts)
+
+    def result(self):
+        """Return the table of the hits per bucket and dimensions."""
+        if self.counts is None:
+            counts = pandas.DataFrame(columns=self._columns())
+            return counts.astype({'bucket': 'int64', 'hits': 'int64'})
+        return self.counts
+
+    def bucket_timestamps(self, bucket_duration=None):
+        """Return the array of the start timestamps (in seconds) of the
+        buckets of the rows of the cube, optionally floored to a longer
+        ``bucket_duration``."""
+        timestamps = self.result()['bucket'].values * self.bucket_duration
+        if bucket_duration is not None:
+            timestamps = np.floor(timestamps / bucket_duration)
+            timestamps = timestamps * bucket_duration
+        return timestamps.astype('float64')
+
+    def rollup(self, dimensions=(), bucket_duration=None):
+        """Return the numbers of hits per value of the given dimensions.
+
+        Parameters
+        ----------
+
+        dimensions
+          A dimension or list of dimensions of the cube. The dimension
+          ``'time'`` designates the (UTC) start dates of the buckets. If no
+          dimensions are given, the total number of hits is returned.
+
+        bucket_duration
+          If provided, the ``'time'`` dimension has buckets of this duration
+          (in seconds, a multiple of the cube's bucket duration), e.g.
+          ``24 * 3600`` for hits per day.
+
+        Returns
+        -------
+
+        A series of numbers of hits indexed by the values of the dimensions
+        (the entries with no value for a dimension are not counted, as in
+        ``value_counts``).
+        """
+        counts = self.result()
+        if isinstance(dimensions, str):
+            dimensions = [dimensions]
+        if len(dimensions) == 0:
+            return int(counts['hits'].sum())
+        keys = []
+        for dimension in dimensions:
+            if dimension == 'time':
+                times = pandas.to_datetime(
+                    self.bucket_timestamps(bucket_duration), unit='s',
+                    utc=True)
+                dimension = pandas.Series(times, index=counts.index,
+                                          name='time')
+            elif dimension not in self.dimensions:
+                raise ValueError('%s is not a dimension of the cube.'
+                                 % dimension)
+            keys.append(dimension)
+        return counts.groupby(keys, observed=True)['hits'].sum()
+
+    def slice(self, start=None, end=None, **selections):
+        """Return a cube restricted to a period and to some dimension values.
+
+        Parameters
+        ----------
+
+        start, end
+          Dates (datetimes, or strings such as "2017-12-01") restricting the
+          buckets to the ones starting in ``[start, end)``. Dates without
+          timezone are assumed to be UTC.
+
+        selections
+          Selected values of some dimensions, e.g. ``country_name='France'``
+          or ``response=[404, 500]``.
+        """
+        counts = self.result()
+        mask = np.ones(len(counts), dtype=bool)
+        timestamps = self.bucket_timestamps()
+        if start is not None:
+            mask &= timestamps >= to_utc(start).timestamp()
+        if end is not None:
+            mask &= timestamps < to_utc(end).timestamp()
+        for dimension, values in selections.items():
+            if dimension not in self.dimensions:
+                raise ValueError('%s is not a dimension of the cube.'
+                                 % dimension)
+            if not pandas.api.types.is_list_like(values):
+                values = [values]
+            mask &= counts[dimension].isin(values).values
+        cube = RollupCube(bucket_duration=self.bucket_duration,
+                          dimensions=self.dimensions)
+        if self.counts is not None:
+            cube.counts = counts[mask].reset_index(drop=True)
+        return cube
+
+    def to_parquet(self, path):
+        """Save the cube in a Parquet file (requires PyArrow)."""
+        _check_pyarrow()
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.Table.from_pandas(self.result(), preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[_METADATA_KEY] = json.dumps(dict(
+            bucket_duration=self.bucket_duration,
+            dimensions=self.dimensions
+        )).encode()
+        pq.write_table(table.replace_schema_metadata(metadata), path)
+
+    @staticmethod
+    def from_parquet(path):
+        """Load a cube saved with ``to_parquet``."""
+        _check_pyarrow()
+        import pyarrow.parquet as pq
+        table = pq.read_table(path)
+        parameters = json.loads(table.schema.metadata[_METADATA_KEY].decode())
+        cube = RollupCube(**parameters)
+        cube.counts = table.to_pandas()
+        return cube
+
+    def countries_colormap(self, mini='auto', maxi='auto', ax=None):
+        """Plot a colormap of the countries hits, return the Matplotlib ax.
+
+        See ``WebLogs.countries_colormap``.
+        """
+        return plots.countries_colormap(self._countries_hits(), mini=mini,
+                                        maxi=maxi, ax=ax)
+
+    def _countries_hits(self):
+        if 'country_code3' in self.dimensions:
+            return self.rollup(['country_code3'])
+        return self.rollup(['country_name'])
+
+    def plot_geo_positions(self, ax=None, country_colors=True,
+                           max_points=1000, resolution=None, hexbin=False):
+        """Plot circles (or hexagons) on a map at the positions of the hits.
+
+        See ``WebLogs.plot_geo_positions``.
+        """
+        country_values = None
+        if country_colors:
+            country_values = self._countries_hits()
+        return plots.plot_geo_positions(
+            self.rollup(['longitude', 'latitude']),
+            country_values=country_values, ax=ax, max_points=max_points,
+            resolution=resolution, hexbin=hexbin)
+
+    def plot_piechart(self, column, ax=None):
+        """Plot a pie chart of the hits per value of a dimension.
+
+        Returns ``(ax, counts)``, see ``WebLogs.plot_piechart``.
+        """
+        count = self.rollup([column]).sort_values(ascending=False)
+        count = count[count > 0]
+        return plots.plot_piechart(count, ax=ax), count
+
+    def plot_timeline(self, bins_per_day=4, ax=None):
+        """Plot a time profile of the hits (with the resolution of the
+        buckets), see ``WebLogs.plot_timeline``."""
+        return plots.plot_timeline(self.bucket_timestamps(),
+                                   weights=self.result()['hits'].values,
+                                   bins_per_day=bins_per_day, ax=ax)
@@ -0,0 +1,66 @@
+"""Compact column types for weblogs dataframes.
+
+By default the weblogs columns hold Python strings (object dtype). In the
+compact schema, the highly repeated text columns are categorical (each row
+only stores an integer code), the numeric fields are small integers or
+float32, and the dates are only stored in the ``parsed_date`` column.
+"""
+
+from collections import OrderedDict
+
+import pandas
+
+CATEGORICAL_FIELDS = ['IP', 'stuff', 'request', 'referrer', 'browser',
+                      'method', 'url', 'http', 'country_name', 'city',
+                      'country_code3', 'domain', 'host']
+INTEGER_FIELDS = ['response', 'status']
+FLOAT32_FIELDS = ['latitude', 'longitude']
+# Columns which can be recomputed from the parsed_date column
+REDUNDANT_DATE_FIELDS = ['date', 'timestamp']
+
+
+def compact_dataframe(dataframe):
+    """Return a copy of a weblogs dataframe with compact column types.
+
+    The text columns of ``CATEGORICAL_FIELDS`` become categorical, the
+    ``INTEGER_FIELDS`` become the smallest unsigned integer type holding
+    their values, the coordinates become float32, and the ``date`` and
+    ``timestamp`` columns are dropped when there is a ``parsed_date``
+    column (which is converted to UTC datetimes if needed).
+    """
+    has_dates = 'parsed_date' in dataframe.columns
+    columns = OrderedDict()
+    for name in dataframe.columns:
+        column = dataframe[name]
+        if has_dates and (name in REDUNDANT_DATE_FIELDS):
+            continue
+        if name == 'parsed_date':
+            column = pandas.to_datetime(column, utc=True)
+        elif name in CATEGORICAL_FIELDS:
+            column = column.astype('category')
+        elif name in INTEGER_FIELDS:
+            column = pandas.to_numeric(column, downcast='unsigned')
+        elif name in FLOAT32_FIELDS:
+            column = column.astype('float32')
+        columns[name] = column
+    return dataframe._constructor(columns, index=dataframe.index)
+
+
+def memory_usage_report(dataframe):
+    """Return a dataframe of the memory used by each column of a dataframe.
+
+    The report has one row per column (and a last "Total" row, including the
+    index) with the ``dtype``, the ``bytes`` used (including the Python
+    strings of object columns) and the ``percent`` of the total.
+    """
+    usage = dataframe.memory_usage(index=True, deep=True)
+    dtypes = [
+        'index' if name == 'Index' else str(dataframe[name].dtype)
+        for name in usage.index
+    ]
+    report = pandas.DataFrame(OrderedDict([
+        ('dtype', dtypes + ['']),
+        ('bytes', list(usage.values) + [usage.sum()]),
+    ]), index=list(usage.index) + ['Total'])
+    report['percent'] = (100.0 * report['bytes'] / max(1, usage.sum())).round(1)
+    return report
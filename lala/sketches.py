@@ -0,0 +1,202 @@
+"""Sketches: approximate aggregations with a small, bounded memory.
+
+- ``HyperLogLog`` estimates numbers of distinct values (e.g. unique IPs).
+- ``SpaceSaving`` finds the most frequent values (top IPs, referrers, urls).
+- ``TDigest`` estimates quantiles (e.g. of the response sizes).
+
+The sketches are updated with arrays of values (e.g. the column of a chunk
+of weblogs) and sketches of the same kind can be merged, e.g. to combine the
+sketches of different files or hosts. See ``lala.reducers`` for reducers
+computing these sketches chunk by chunk.
+"""
+
+import numpy as np
+import pandas
+
+
+def hash_values(values):
+    """Return the 64-bit hashes (uint64 array) of an array of values.
+
+    Non-string values are hashed through their string representation, so
+    the hashes do not depend on the dtype of the array (e.g. categorical).
+    """
+    codes, uniques = pandas.factorize(np.asarray(values, dtype=object))
+    hashes = pandas.util.hash_array(np.asarray(uniques, dtype=object),
+                                    categorize=False)
+    return hashes[codes]
+
+
+def _non_null(values):
+    values = np.asarray(values, dtype=object)
+    return values[~pandas.isnull(values)]
+
+
+def _bit_lengths(integers):
+    """Return the number of bits of each integer of an uint64 array."""
+    high = (integers >> np.uint64(32)).astype('float64')
+    low = (integers & np.uint64(0xffffffff)).astype('float64')
+    return np.where(high > 0, 32 + np.frexp(high)[1], np.frexp(low)[1])
+
+
+def _hyperloglog_estimate(registers):
+    """Estimate the distinct counts of HyperLogLog registers (last axis)."""
+    registers = np.asarray(registers)
+    m = registers.shape[-1]
+    alpha = 0.7213 / (1 + 1.079 / m)
+    powers = 2.0 ** -registers.astype('float64')
+    raw = alpha * m * m / np.sum(powers, axis=-1)
+    zeros = np.sum(registers == 0, axis=-1)
+    linear = m * np.log(m / np.maximum(zeros, 1))
+    return np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
+
+
+class HyperLogLog:
+    """Estimate the number of distinct values seen, in constant memory.
+
+    The sketch uses ``2 ** precision`` bytes and has a relative standard
+    error of about ``1.04 / sqrt(2 ** precision)``, i.e. 1.6% for the default
+    precision of 12 (4kB), whatever the number of values.
+    """
+
+    def __init__(self, precision=12):
+        self.precision = precision
+        self.registers = np.zeros(2 ** precision, dtype='uint8')
+
+    @staticmethod
+    def registers_updates(hashes, precision):
+        """Return the register indices and ranks of an array of hashes."""
+        suffix_bits = 64 - precision
+        indices = (hashes >> np.uint64(suffix_bits)).astype('int64')
+        suffixes = hashes & np.uint64((1 << suffix_bits) - 1)
+        ranks = (suffix_bits - _bit_lengths(suffixes) + 1).astype('uint8')
+        return indices, ranks
+
+    def update(self, values):
+        """Add the (non-null) values of an array to the sketch."""
+        hashes = hash_values(_non_null(values))
+        indices, ranks = self.registers_updates(hashes, self.precision)
+        np.maximum.at(self.registers, indices, ranks)
+
+    def merge(self, other):
+        """Add the values of another sketch (of same precision)."""
+        if other.precision != self.precision:
+            raise ValueError('Cannot merge HyperLogLogs of different '
+                             'precisions.')
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self):
+        """Return the estimated number of distinct values."""
+        return int(round(float(_hyperloglog_estimate(self.registers))))
+
+
+class SpaceSaving:
+    """Find the most frequent values with at most ``capacity`` counters.
+
+    ``counts`` is a series of the counted values (sorted by decreasing
+    count) with an over-estimation of their numbers of occurences, by at
+    most the corresponding value of ``errors``. All values occuring more than
+    ``N / capacity`` times (for ``N`` values seen) are in the counts.
+    """
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self.counts = pandas.Series([], dtype='int64')
+        self.errors = pandas.Series([], dtype='int64')
+
+    def minimum(self):
+        """Return the maximal number of occurences of the values which are
+        not counted."""
+        if len(self.counts) < self.capacity:
+            return 0
+        return int(self.counts.min())
+
+    def _add_counters(self, counts, errors, minimum):
+        own_minimum = self.minimum()
+        index = self.counts.index.union(counts.index)
+        new_counts = (self.counts.reindex(index, fill_value=own_minimum) +
+                      counts.reindex(index, fill_value=minimum))
+        new_errors = (self.errors.reindex(index, fill_value=own_minimum) +
+                      errors.reindex(index, fill_value=minimum))
+        new_counts = new_counts.sort_values(ascending=False, kind='mergesort')
+        self.counts = new_counts.iloc[:self.capacity].astype('int64')
+        self.errors = new_errors[self.counts.index].astype('int64')
+
+    def update(self, values):
+        """Count the (non-null) values of an array."""
+        counts = pandas.Series(_non_null(values)).value_counts()
+        minimum = 0
+        if len(counts) > self.capacity:
+            minimum = int(counts.iloc[self.capacity])
+            counts = counts.iloc[:self.capacity]
+        errors = pandas.Series(0, index=counts.index, dtype='int64')
+        self._add_counters(counts, errors, minimum)
+
+    def merge(self, other):
+        """Add the counts of another summary."""
+        self._add_counters(other.counts, other.errors, other.minimum())
+
+    def top(self, n=10):
+        """Return the series of the estimated counts of the n most frequent
+        values."""
+        return self.counts.iloc[:n]
+
+
+class TDigest:
+    """Estimate quantiles of numeric values with a bounded number of
+    centroids (t-digest).
+
+    The values are summarized by centroids (mean, weight) which are small
+    near the extreme quantiles, so the estimation of the tail quantiles
+    (99%, 99.9%) is more precise than the median's. There are at most about
+    ``compression`` centroids.
+    """
+
+    def __init__(self, compression=200):
+        self.compression = compression
+        self.means = np.zeros(0)
+        self.weights = np.zeros(0)
+        self.min = np.inf
+        self.max = -np.inf
+
+    def _add_centroids(self, means, weights):
+        means = np.concatenate([self.means, means])
+        weights = np.concatenate([self.weights, weights])
+        order = np.argsort(means, kind='mergesort')
+        means, weights = means[order], weights[order]
+        # Centroids with their left quantile in the same unit interval of the
+        # scale k(q) = compression / pi * asin(2q - 1) are merged together.
+        left_quantiles = (np.cumsum(weights) - weights) / weights.sum()
+        scale = self.compression / np.pi
+        k = np.floor(scale * np.arcsin(2 * left_quantiles - 1))
+        clusters = np.concatenate([[0], np.cumsum(np.diff(k) > 0)])
+        self.weights = np.bincount(clusters, weights=weights)
+        self.means = (np.bincount(clusters, weights=means * weights) /
+                      self.weights)
+
+    def update(self, values):
+        """Add the (non-null) numeric values of an array."""
+        values = pandas.to_numeric(pandas.Series(values), errors='coerce')
+        values = values.dropna().values.astype('float64')
+        if len(values) == 0:
+            return
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self._add_centroids(values, np.ones(len(values)))
+
+    def merge(self, other):
+        """Add the values of another t-digest."""
+        if len(other.weights) == 0:
+            return
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._add_centroids(other.means, other.weights)
+
+    def quantile(self, q):
+        """Return the estimated quantile(s) q (between 0 and 1)."""
+        total = self.weights.sum()
+        if total == 0:
+            return np.full(np.shape(q), np.nan)[()]
+        centers = np.cumsum(self.weights) - self.weights / 2
+        positions = np.concatenate([[0], centers, [total]])
+        values = np.concatenate([[self.min], self.means, [self.max]])
+        return np.interp(np.asarray(q) * total, positions, values)
@@ -0,0 +1,136 @@
+"""Storage of parsed weblogs in Parquet files, partitioned by day.
+
+A store is a directory with one sub-directory per (UTC) day, named like
+``2017-12-01``, containing the Parquet files ``part-00000.parquet``,
+``part-00001.parquet``, etc. of the entries of that day. New entries can be
+appended as new parts, and reading only loads the days and columns needed.
+This requires PyArrow.
+"""
+
+import importlib.util
+import os
+import re
+
+import pandas
+
+from .parsing import to_utc
+
+PYARROW_INSTALLED = importlib.util.find_spec('pyarrow') is not None
+DAY_FORMAT = '%Y-%m-%d'
+_DAY_REGEXPR = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+_PART_REGEXPR = re.compile(r'^part-(\d+)\.parquet$')
+
+
+def _check_pyarrow():
+    if not PYARROW_INSTALLED:
+        raise ImportError('This feature requires PyArrow installed.')
+
+
+def list_store_days(path):
+    """Return the sorted list of the days (``YYYY-MM-DD``) in a store."""
+    if not os.path.isdir(path):
+        return []
+    return sorted(
+        name for name in os.listdir(path)
+        if _DAY_REGEXPR.match(name) and os.path.isdir(os.path.join(path, name))
+    )
+
+
+def _list_day_parts(day_directory):
+    return sorted(name for name in os.listdir(day_directory)
+                  if _PART_REGEXPR.match(name))
+
+
+def write_store(dataframe, path, append=False):
+    """Write the entries of a weblogs dataframe in a store.
+
+    The entries are split by day of their ``parsed_date``. If ``append`` is
+    True, the entries of each day are added to the store as a new part of
+    that day. Otherwise, the days present in the dataframe are replaced in
+    the store (and the other days of the store are left unchanged).
+    """
+    _check_pyarrow()
+    days = dataframe['parsed_date'].dt.floor('D')
+    for day, day_dataframe in dataframe.groupby(days, sort=True):
+        day_directory = os.path.join(path, day.strftime(DAY_FORMAT))
+        if not os.path.exists(day_directory):
+            os.makedirs(day_directory)
+        parts = _list_day_parts(day_directory)
+        if not append:
+            for part in parts:
+                os.remove(os.path.join(day_directory, part))
+            parts = []
+        part_index = 0
+        if len(parts):
+            part_index = 1 + int(_PART_REGEXPR.match(parts[-1]).group(1))
+        part_path = os.path.join(day_directory,
+                                 'part-%05d.parquet' % part_index)
+        # Write then rename, so readers never see a partially written part
+        temporary_path = part_path + '.tmp'
+        pandas.DataFrame(day_dataframe).to_parquet(temporary_path,
+                                                   index=False)
+        os.replace(temporary_path, part_path)
+
+
+def read_store(path, columns=None, start=None, end=None):
+    """Return a dataframe of the entries of a store, ordered by time.
+
+    Parameters
+    ----------
+
+    path
+      Path to the store directory.
+
+    columns
+      List of the columns to read, or None for all columns.
+
+    start, end
+      Dates (datetimes, or strings such as "2017-12-01 12:00") restricting
+      the entries to ``start <= parsed_date < end``. Dates without timezone
+      are assumed to be UTC. Only the files of the days in that range are
+      read.
+    """
+    _check_pyarrow()
+    import pyarrow.parquet as pq
+    start = None if start is None else to_utc(start)
+    end = None if end is None else to_utc(end)
+    days = list_store_days(path)
+    if start is not None:
+        days = [day for day in days if day >= start.strftime(DAY_FORMAT)]
+    if end is not None:
+        days = [day for day in days if day <= end.strftime(DAY_FORMAT)]
+    read_columns = columns
+    if (columns is not None) and ('parsed_date' not in columns):
+        read_columns = list(columns) + ['parsed_date']
+    dataframes = []
+    for day in days:
+        day_directory = os.path.join(path, day)
+        for part in _list_day_parts(day_directory):
+            part_path = os.path.join(day_directory, part)
+            part_columns = read_columns
+            if read_columns is not None:
+                names = pq.read_schema(part_path).names
+                part_columns = [c for c in read_columns if c in names]
+            dataframes.append(pandas.read_parquet(part_path,
+                                                  columns=part_columns))
+    if len(dataframes) == 0:
+        return pandas.DataFrame(columns=columns or [])
+    categorical_columns = set(
+        name
+        for dataframe in dataframes
+        for name in dataframe.columns
+        if dataframe[name].dtype.name == 'category'
+    )
+    dataframe = pandas.concat(dataframes, ignore_index=True, sort=False)
+    for name in categorical_columns:
+        if dataframe[name].dtype.name != 'category':
+            dataframe[name] = dataframe[name].astype('category')
+    if start is not None:
+        dataframe = dataframe[dataframe['parsed_date'] >= start]
+    if end is not None:
+        dataframe = dataframe[dataframe['parsed_date'] < end]
+    dataframe = dataframe.sort_values('parsed_date', kind='mergesort')
+    dataframe = dataframe.reset_index(drop=True)
+    if columns is not None:
+        dataframe = dataframe[list(columns)]
+    return dataframe
@@ -0,0 +1,155 @@
+"""Incremental reading of live log files.
+
+A ``LogTailer`` remembers, for each log file, the inode of the file and the
+byte offset up to which it has been read, so that each update only reads
+and parses the lines appended since the previous update. The checkpoints
+can be saved in a JSON file so that updates can be run periodically from
+different processes (e.g. a cron job).
+"""
+
+import json
+import os
+
+import pandas
+
+from .WebLogs import WebLogs
+
+
+class LogTailer:
+    """Read the new entries of live log files since the previous update.
+
+    Log rotations (the file is renamed, e.g. to ``access.log.1``, and a new
+    file is created) are detected from the change of inode: the end of the
+    rotated file is read if it can still be found, uncompressed, in the same
+    directory, then the new file is read from the start. Truncated files
+    (smaller than the saved offset) are read from the start.
+
+    Only complete lines are read: a line still being written (without a
+    final line break) is left for the next update.
+
+    Parameters
+    ----------
+
+    filepaths
+      List of the paths of the log files to follow.
+
+    checkpoint_path
+      Path to a JSON file where the offsets and inodes of the files are
+      saved after each update (and loaded at initialization if the file
+      exists). If None, the checkpoints are only kept in memory.
+
+    Examples
+    --------
+
+    >>> from lala.reducers import CountsReducer
+    >>> countries = CountsReducer('country_name')
+    >>> tailer = LogTailer(['/var/log/nginx/access.log'],
+    >>>                    checkpoint_path='access_log_checkpoints.json')
+    >>> # Then, periodically:
+    >>> new_weblogs, errors = tailer.update(store_path='weblogs_store/',
+    >>>                                     reducers=[countries])
+    """
+
+    def __init__(self, filepaths, checkpoint_path=None):
+        self.filepaths = [os.path.abspath(f) for f in filepaths]
+        self.checkpoint_path = checkpoint_path
+        self.checkpoints = {}
+        if (checkpoint_path is not None) and os.path.exists(checkpoint_path):
+            with open(checkpoint_path, 'r') as f:
+                self.checkpoints = json.load(f)
+
+    def save_checkpoints(self):
+        """Write the checkpoints in the checkpoint file (if any)."""
+        if self.checkpoint_path is None:
+            return
+        temporary_path = self.checkpoint_path + '.tmp'
+        with open(temporary_path, 'w') as f:
+            json.dump(self.checkpoints, f, indent=2)
+        os.replace(temporary_path, self.checkpoint_path)
+
+    def _find_rotated_file(self, filepath, inode):
+        directory = os.path.dirname(filepath)
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            if (path != filepath) and os.path.isfile(path) and (
+                    os.stat(path).st_ino == inode):
+                return path
+        return None
+
+    def _read_complete_lines(self, path, offset):
+        """Return the complete lines of a file after the offset, and the
+        offset of the end of the last complete line."""
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+        data = data[:data.rfind(b'\n') + 1]
+        lines = data.decode('utf8', errors='replace').split('\n')[:-1]
+        return lines, offset + len(data)
+
+    def read_new_lines(self, filepath):
+        """Return the lines appended to a file since its checkpoint.
+
+        Returns ``(lines, checkpoint)`` where ``checkpoint`` is the new
+        checkpoint of the file, after these lines. The checkpoints of the
+        tailer are not modified: the new checkpoint should be set in
+        ``self.checkpoints[filepath]`` once the lines are processed.
+        """
+        filepath = os.path.abspath(filepath)
+        if not os.path.exists(filepath):
+            return [], self.checkpoints.get(filepath)
+        stat = os.stat(filepath)
+        checkpoint = self.checkpoints.get(filepath)
+        lines, offset = [], 0
+        if checkpoint is not None:
+            if checkpoint['inode'] == stat.st_ino:
+                if checkpoint['offset'] <= stat.st_size:
+                    offset = checkpoint['offset']
+            else:
+                rotated_path = self._find_rotated_file(filepath,
+                                                       checkpoint['inode'])
+                if rotated_path is not None:
+                    lines, _ = self._read_complete_lines(
+                        rotated_path, checkpoint['offset'])
+        new_lines, offset = self._read_complete_lines(filepath, offset)
+        return lines + new_lines, dict(inode=stat.st_ino, offset=offset)
+
+    def update(self, store_path=None, reducers=(), geolocation=True,
+               compact=False):
+        """Parse the new entries of the log files since the last update.
+
+        The new weblogs (of all files, ordered by time) are appended to the
+        store at ``store_path`` if provided (see ``WebLogs.to_store``), and
+        fed to each reducer of ``reducers`` (see ``lala.reducers``). Then
+        the checkpoints are updated and saved: if the update fails or is
+        interrupted before that, the same entries will be read again at the
+        next update.
+
+        Returns ``(weblogs, errored_lines)`` where ``errored_lines`` is a
+        dict ``{filepath: [index, ...]}`` of the indices of the lines which
+        could not be parsed, among the new lines of the file (i.e. the
+        lines after its previous checkpoint).
+        """
+        all_weblogs, errored_lines, new_checkpoints = [], {}, {}
+        for filepath in self.filepaths:
+            lines, checkpoint = self.read_new_lines(filepath)
+            weblogs, errors = WebLogs.from_nginx_weblogs(
+                log_lines=lines, geolocation=geolocation and len(lines) > 0)
+            all_weblogs.append(weblogs)
+            errored_lines[filepath] = errors
+            if checkpoint is not None:
+                new_checkpoints[filepath] = checkpoint
+        if len(all_weblogs) == 0:
+            all_weblogs = [WebLogs.from_nginx_weblogs(log_lines=[],
+                                                      geolocation=False)[0]]
+        weblogs = pandas.concat(all_weblogs, ignore_index=True)
+        weblogs = weblogs.sort_values('parsed_date', kind='mergesort')
+        weblogs = WebLogs(weblogs.reset_index(drop=True))
+        if compact:
+            weblogs = weblogs.compact()
+        if (store_path is not None) and len(weblogs):
+            weblogs.to_store(store_path, append=True)
+        for reducer in reducers:
+            reducer.update(weblogs)
+        self.checkpoints.update(new_checkpoints)
+        self.save_checkpoints()
+        return weblogs, errored_lines
@@ -2,6 +2,7 @@ import os
 import matplotlib
 matplotlib.use("Agg")
 from lala import WebLogs
+from lala.domains import DomainsCache
 
 access_log_path = os.path.join('tests', 'data', "test_logs.txt")
 template_path = os.path.join('tests', 'data', "template.pug")
@@ -31,7 +32,8 @@ def test_basics(tmpdir):
     weblogs.plot_most_frequent_visitors()
 
     sub_weblogs = weblogs[-50:]
-    sub_weblogs.identify_ips_domains()
+    sub_weblogs.identify_ips_domains(cache=DomainsCache(
+        path=os.path.join(str(tmpdir), 'domains.sqlite')))
     filtered_weblogs = sub_weblogs.filter_by_text_search(
         terms=['googlebot', 'spider.yandex', 'baidu', 'msnbot'],
         not_in='domain'
@@ -42,6 +44,7 @@ def test_template(tmpdir):
     # LOAD ALL RECORDS TO ANALYSE AND AVAILABLE PRIMERS
     weblogs, errored_lines = WebLogs.from_nginx_weblogs(access_log_path)
     sub_weblogs = weblogs[-50:]
-    sub_weblogs.identify_ips_domains()
+    sub_weblogs.identify_ips_domains(cache=DomainsCache(
+        path=os.path.join(str(tmpdir), 'domains.sqlite')))
     target_path = os.path.join(str(tmpdir), "output.pdf")
     sub_weblogs.write_report(template_path=template_path, target=target_path)
@@ -0,0 +1,82 @@
+import os
+import socket
+import threading
+from lala import WebLogs, conf
+from lala.domains import resolve_domains, DomainsCache
+
+
+def test_resolve_domains():
+    hung_lookup = threading.Event()
+
+    def resolver(ip):
+        if ip == '0.0.0.0':
+            raise socket.herror()
+        if ip == '8.8.8.8':
+            raise socket.gaierror()
+        if ip == '7.7.7.7':
+            raise OSError()
+        if ip == '9.9.9.9':
+            hung_lookup.wait()
+        return 'domain-' + ip
+
+    ips = (['9.9.9.9'] + ['%d.1.1.1' % i for i in range(20)] +
+           ['0.0.0.0', '8.8.8.8', '7.7.7.7'])
+    threads_before = set(threading.enumerate())
+    domains = resolve_domains(ips, resolver=resolver, n_threads=2,
+                              timeout=1)
+    # The hung lookup is abandoned, in a thread which won't block the exit
+    assert '9.9.9.9' not in domains
+    new_threads = set(threading.enumerate()) - threads_before
+    assert len(new_threads) and all(thread.daemon for thread in new_threads)
+    hung_lookup.set()
+    assert len(domains) == 23
+    assert [domains[ip] for ip in ['0.0.0.0', '8.8.8.8', '7.7.7.7']] == [
+        None, None, None]
+    assert domains['3.1.1.1'] == 'domain-3.1.1.1'
+
+
+def test_domains_cache(tmpdir):
+    cache_path = os.path.join(str(tmpdir), 'cache.sqlite')
+    cache = DomainsCache(path=cache_path, max_size=3)
+    looked_up_ips = []
+
+    def resolver(ip):
+        looked_up_ips.append(ip)
+        if ip == '0.0.0.0':
+            raise socket.herror()
+        return 'domain-' + ip
+
+    weblogs = WebLogs({'IP': ['1.1.1.1', '2.2.2.2', '0.0.0.0', '1.1.1.1']})
+    known_ips = weblogs.identify_ips_domains(resolver=resolver, cache=cache,
+                                             logger=None)
+    assert sorted(known_ips) == ['1.1.1.1', '2.2.2.2']
+    assert list(weblogs.domain) == ['domain-1.1.1.1', 'domain-2.2.2.2',
+                                    'Unknown', 'domain-1.1.1.1']
+
+    # A new run (with a new cache object) only looks up the new IPs.
+    weblogs = WebLogs({'IP': ['1.1.1.1', '0.0.0.0', '3.3.3.3']})
+    weblogs.identify_ips_domains(
+        resolver=resolver, logger=None,
+        cache=DomainsCache(path=cache_path, max_size=3))
+    assert sorted(looked_up_ips) == ['0.0.0.0', '1.1.1.1', '2.2.2.2',
+                                     '3.3.3.3']
+    assert list(weblogs.domain) == ['domain-1.1.1.1', 'Unknown',
+                                    'domain-3.3.3.3']
+    assert len(cache) == 3
+
+    expired_cache = DomainsCache(path=cache_path, ttl=-1, negative_ttl=-1)
+    assert expired_cache.get_domains(['1.1.1.1', '0.0.0.0']) == {}
+
+
+def test_domains_cache_is_opt_in(tmpdir):
+    default_path = conf['domains_cache_path']
+    conf['domains_cache_path'] = os.path.join(str(tmpdir), 'cache.sqlite')
+    try:
+        weblogs = WebLogs({'IP': ['1.1.1.1']})
+        weblogs.identify_ips_domains(resolver=lambda ip: 'domain', logger=None)
+        assert not os.path.exists(conf['domains_cache_path'])
+        weblogs.identify_ips_domains(resolver=lambda ip: 'domain', logger=None,
+                                     cache='default')
+        assert os.path.exists(conf['domains_cache_path'])
+    finally:
+        conf['domains_cache_path'] = default_path
@@ -0,0 +1,70 @@
+import os
+from lala import WebLogs
+from lala.ips import IPRanges
+
+access_log_path = os.path.join('tests', 'data', "test_logs.txt")
+
+
+def test_filter_by_text_search():
+    weblogs, _ = WebLogs.from_nginx_weblogs(access_log_path,
+                                            geolocation=False)
+    bots = weblogs.filter_by_text_search(['bot', 'spider'], are_in='browser')
+    assert len(bots) == 15
+    assert all(('bot' in b) or ('spider' in b) for b in bots.browser)
+    humans = weblogs.filter_by_text_search(['bot', 'spider'],
+                                           not_in='browser')
+    assert len(humans) + len(bots) == len(weblogs)
+    # Special characters in the terms are not interpreted as regexes
+    assert len(weblogs.filter_by_text_search(['.*'], are_in='url')) == 0
+
+    fields = ['browser', 'url']
+    matches = weblogs.filter_by_text_search(['bot', 'php'], are_in=fields)
+    non_matches = weblogs.filter_by_text_search(['bot', 'php'], not_in=fields)
+    assert len(matches) + len(non_matches) == len(weblogs)
+    assert len(matches) > len(weblogs.filter_by_text_search(
+        ['bot', 'php'], are_in='browser'))
+
+    # Non-text values (e.g. the integer responses of compact weblogs) are
+    # searched as texts
+    compact = weblogs.compact()
+    for terms, field in [(['40'], 'response'), (['30', '50'], 'response'),
+                         (['bot', 'spider'], 'browser'), (['12'], 'status')]:
+        for kwargs in (dict(are_in=field), dict(not_in=field)):
+            entries = weblogs.filter_by_text_search(terms, **kwargs)
+            compact_entries = compact.filter_by_text_search(terms, **kwargs)
+            assert list(compact_entries.index) == list(entries.index)
+    assert len(compact.filter_by_text_search(['40'], are_in='response')) > 0
+    weblogs.loc[weblogs.index[:10], 'browser'] = None
+    assert len(weblogs.filter_by_text_search(
+        ['bot', 'spider'], not_in='browser')) == len(humans) - 10
+
+
+def test_ip_ranges():
+    ip_ranges = IPRanges(['10.0.0.0/8', '10.1.0.0/16', '11.0.0.0/8',
+                          '1.2.3.4', '2001:db8::/32'])
+    assert len(ip_ranges) == 3  # the 10.x.x.x and 11.x.x.x ranges merged
+    ips = ['10.2.3.4', '11.255.255.255', '12.0.0.0', '1.2.3.4', '1.2.3.5',
+           '2001:db8::1', '2001:db9::1', None, 'unknown']
+    assert list(ip_ranges.contains(ips)) == [
+        True, True, False, True, False, True, False, False, False]
+
+    # Lists read from files may have blank lines, and non-IP values
+    ip_ranges = IPRanges(['10.0.0.0/8', '', None, 'localhost', ' 1.2.3.4\n'])
+    assert len(ip_ranges) == 3
+    assert list(ip_ranges.contains(['10.1.1.1', 'localhost', '', None,
+                                    '1.2.3.4', 'unknown'])) == [
+        True, True, False, False, True, False]
+
+
+def test_blacklist_whitelist_ips():
+    weblogs, _ = WebLogs.from_nginx_weblogs(access_log_path,
+                                            geolocation=False)
+    assert len(weblogs.blacklist_ips(['181.86.41.10'])) == 926
+    # e.g. a blacklist file read with f.read().split('\n')
+    assert len(weblogs.blacklist_ips('181.86.41.10\n'.split('\n'))) == 926
+    blacklisted = weblogs.blacklist_ips(['181.86.0.0/16', '3.100.33.138'])
+    whitelisted = weblogs.whitelist_ips(IPRanges(['181.86.0.0/16',
+                                                  '3.100.33.138']))
+    assert len(blacklisted) + len(whitelisted) == len(weblogs)
+    assert all(ip.startswith('181.86.') or ip == '3.100.33.138'
+               for ip in whitelisted.IP)
@@ -0,0 +1,30 @@
+import numpy as np
+from lala.geolocation import geolocate_ips, GeoIPCache, GeoIPBackend
+
+
+def test_geolocate_ips():
+    looked_up_ips = []
+
+    class LocalGeoIP(GeoIPBackend):
+        def __init__(self):
+            pass
+
+        def record_by_addr(self, ip):
+            looked_up_ips.append(ip)
+            if ip == '0.0.0.0':
+                return None
+            return dict(country_name='Country ' + ip, city='City ' + ip,
+                        country_code3='C' + ip, latitude=1.0, longitude=2.0)
+
+    cache = GeoIPCache(max_size=2)
+    ips = ['1.1.1.1', '2.2.2.2', '1.1.1.1', '0.0.0.0', None, '2.2.2.2']
+    geo = geolocate_ips(ips, geoip=LocalGeoIP(), cache=cache)
+    assert looked_up_ips == ['1.1.1.1', '2.2.2.2', '0.0.0.0']
+    assert list(geo.city) == ['City 1.1.1.1', 'City 2.2.2.2', 'City 1.1.1.1',
+                              None, None, 'City 2.2.2.2']
+    assert np.isnan(geo.latitude[3]) and (geo.longitude[:3] == 2.0).all()
+    assert len(cache.records) == 2
+
+    geolocate_ips(['0.0.0.0', '2.2.2.2'], geoip=LocalGeoIP(), cache=cache)
+    assert len(looked_up_ips) == 3
+    assert cache.n_hits == 2
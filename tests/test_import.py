@@ -0,0 +1,32 @@
+import subprocess
+import sys
+
+IMPORT_CODE = """
+import sys
+accesses = []
+def audit(event, args):
+    if event in ('socket.connect', 'urllib.Request') or (
+            event == 'open' and str(args[0]).endswith(('.dat', '.shp'))):
+        accesses.append(event)
+sys.addaudithook(audit)
+import lala
+print(accesses, [m for m in ('cartopy', 'pdf_reports', 'pygeoip')
+                 if m in sys.modules])
+"""
+
+
+def test_import_is_lazy():
+    output = subprocess.check_output([sys.executable, '-c', IMPORT_CODE],
+                                     universal_newlines=True)
+    assert output.strip() == '[] []'
+
+
+def test_weblogs_module_compatibility():
+    from lala.WebLogs import (init_map, name_to_geometry, name_to_extent,
+                              CARTOPY_INSTALLED)
+    from lala import maps
+    assert init_map is maps.init_map
+    if CARTOPY_INSTALLED:
+        assert name_to_geometry['FRA'].bounds == name_to_extent['FRA']
+    else:
+        assert name_to_geometry is None
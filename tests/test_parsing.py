@@ -0,0 +1,87 @@
+import os
+import re
+import gzip
+import bz2
+from datetime import datetime
+import pandas
+import pytest
+from lala import WebLogs
+from lala.parsing import parse_nginx_log_lines, parse_nginx_dates
+
+access_log_path = os.path.join('tests', 'data', "test_logs.txt")
+
+
+def test_parse_nginx_log_lines():
+    with open(access_log_path, 'r') as f:
+        log_lines = f.read().split("\n")
+    log_lines = ['', 'not a log line'] + log_lines[:100]
+    records, errored_lines = parse_nginx_log_lines(log_lines, chunksize=30)
+    assert errored_lines == [0, 1]
+    assert len(records) == 100
+    regexpr = re.compile(
+        r'(.*) -(.*) - \[(.*)\] "(.*)" (\d+) (\d+) "(.*)" "(.*)"')
+    for line, (i, row) in zip(log_lines[2:], records.iterrows()):
+        ip, _, date, request, _, _, referrer, browser = regexpr.match(
+            line).groups()
+        assert (row.IP, row.request, row.browser) == (ip, request, browser)
+        timestamp = datetime.strptime(date, '%d/%b/%Y:%H:%M:%S %z')
+        assert row.timestamp == timestamp.timestamp()
+        assert [row.method, row.url, row.http] == request.split()
+
+
+def test_from_nginx_weblogs_columns():
+    weblogs, _ = WebLogs.from_nginx_weblogs(access_log_path)
+    assert list(weblogs.columns) == [
+        'IP', 'stuff', 'date', 'request', 'response', 'status', 'referrer',
+        'browser', 'parsed_date', 'timestamp', 'country_name', 'city',
+        'country_code3', 'latitude', 'longitude', 'method', 'url', 'http']
+
+
+def test_parse_nginx_dates():
+    dates = ['01/Dec/2017:12:55:21 +0000', '29/Feb/2016:23:59:59 -0130']
+    parsed = parse_nginx_dates(dates)
+    expected = [datetime.strptime(d, '%d/%b/%Y:%H:%M:%S %z') for d in dates]
+    assert [d.timestamp() for d in parsed] == [
+        d.timestamp() for d in expected]
+    for invalid_date in ['32/Dec/2017:12:55:21 +0000',
+                         '29/Feb/2017:12:55:21 +0000',
+                         '01/Dec/2017:25:55:21 +0000',
+                         '01/Dec/2017:12:61:21 +0000']:
+        with pytest.raises(ValueError):
+            parse_nginx_dates([dates[0], invalid_date])
+    # Leap seconds are left to pandas.to_datetime
+    leap_second = ['01/Dec/2017:12:55:61 +0000']
+    assert parse_nginx_dates(leap_second).tolist() == pandas.to_datetime(
+        leap_second, format='%d/%b/%Y:%H:%M:%S %z', utc=True).tolist()
+
+
+def test_from_nginx_weblogs_files(tmpdir):
+    with open(access_log_path, 'r') as f:
+        log_lines = f.read().split("\n")
+    rotated_logs = [
+        ('access.log', open, log_lines[800:]),
+        ('access.log.1', gzip.open, log_lines[400:800] + ['error']),
+        ('access.log.2.gz', bz2.open, log_lines[:400]),
+    ]
+    for name, open_function, lines in rotated_logs:
+        with open_function(os.path.join(str(tmpdir), name), 'wt') as f:
+            f.write("\n".join(lines))
+    weblogs, errored_lines = WebLogs.from_nginx_weblogs_files(
+        str(tmpdir), n_jobs=2)
+    assert len(weblogs) == len(log_lines)
+    assert weblogs.timestamp.is_monotonic_increasing
+    assert list(weblogs.columns) == [
+        'IP', 'stuff', 'date', 'request', 'response', 'status', 'referrer',
+        'browser', 'parsed_date', 'timestamp', 'country_name', 'city',
+        'country_code3', 'latitude', 'longitude', 'method', 'url', 'http']
+    assert errored_lines[os.path.join(str(tmpdir), 'access.log.1')] == [400]
+    assert weblogs.country_name.notnull().any()  # geolocated once merged
+    weblogs, errored_lines = WebLogs.from_nginx_weblogs_files(
+        os.path.join(str(tmpdir), 'access.log.*'), n_jobs=1,
+        geolocation=False)
+    assert len(weblogs) == 800
+    assert len(errored_lines) == 2
+    assert 'country_name' not in weblogs.columns
+    weblogs, errored_lines = WebLogs.from_nginx_weblogs_files(
+        os.path.join(str(tmpdir), 'no_such_log*'))
+    assert len(weblogs) == 0 and len(errored_lines) == 0
@@ -0,0 +1,55 @@
+import os
+import numpy as np
+import pandas
+import pytest
+from lala import WebLogs
+from lala.plots import bin_positions
+
+access_log_path = os.path.join('tests', 'data', "test_logs.txt")
+
+
+def test_bin_positions():
+    positions_counts = pandas.Series(
+        [1, 2, 3, 4],
+        index=pandas.MultiIndex.from_tuples([(0.2, 0.3), (0.7, 0.9),
+                                             (1.5, 0.5), (-0.5, 0.5)]))
+    binned = bin_positions(positions_counts, resolution=1).to_dict()
+    assert binned == {(0.5, 0.5): 3, (1.5, 0.5): 3, (-0.5, 0.5): 4}
+
+
+def test_plot_geo_positions():
+    pytest.importorskip('cartopy')
+    import matplotlib.pyplot as plt
+    weblogs, _ = WebLogs.from_nginx_weblogs(access_log_path)
+    n_positions = len(weblogs.groupby(['longitude', 'latitude']).size())
+    ax = weblogs.plot_geo_positions(country_colors=False, max_points=None)
+    assert len(ax.collections[-1].get_offsets()) == n_positions
+    plt.close(ax.figure)
+    ax = weblogs.plot_geo_positions(country_colors=False, max_points=5)
+    assert len(ax.collections[-1].get_offsets()) == 5
+    plt.close(ax.figure)
+    ax = weblogs.plot_geo_positions(country_colors=False, hexbin=True,
+                                    resolution=5)
+    assert np.sum(ax.collections[-1].get_array()) == \
+        weblogs.latitude.notnull().sum()
+    plt.close(ax.figure)
+
+
+def test_countries_colormap(tmpdir):
+    pytest.importorskip('cartopy')
+    import matplotlib.pyplot as plt
+    from lala.maps import load_countries, get_countries
+    cache_path = os.path.join(str(tmpdir), 'countries.pickle')
+    countries = load_countries(cache_path)
+    assert os.path.exists(cache_path)
+    cached_countries = load_countries(cache_path)
+    assert [k for k, _ in cached_countries] == [k for k, _ in countries]
+    assert cached_countries[0][1].equals(countries[0][1])
+
+    weblogs, _ = WebLogs.from_nginx_weblogs(access_log_path)
+    _, lookup = get_countries()
+    codes = weblogs.country_code3.dropna().unique()
+    ax = weblogs.countries_colormap()
+    n_patches = len(ax.collections[-1].get_paths())
+    assert n_patches == len([code for code in codes if code in lookup])
+    plt.close(ax.figure)
@@ -0,0 +1,64 @@
+import os
+import pandas
+from lala import WebLogs
+from lala.reducers import (CountsReducer, TimelineReducer, VisitsReducer,
+                          DistinctCountReducer, TopValuesReducer,
+                          QuantilesReducer)
+
+access_log_path = os.path.join('tests', 'data', "test_logs.txt")
+
+
+def test_iter_nginx_weblogs():
+    weblogs, errored_lines = WebLogs.from_nginx_weblogs(access_log_path)
+    chunks = list(WebLogs.iter_nginx_weblogs(access_log_path, chunksize=100))
+    assert len(chunks) == 13
+    assert pandas.concat([chunk for chunk, _ in chunks]).equals(weblogs)
+    log_lines = ['error'] + 150 * ['x - - [error'] + ['']
+    chunks = list(WebLogs.iter_nginx_weblogs(log_lines=log_lines,
+                                             chunksize=100))
+    errored_lines = sum([errors for _, errors in chunks], [])
+    assert errored_lines == list(range(152))
+
+
+def test_reduce_nginx_weblogs():
+    weblogs, _ = WebLogs.from_nginx_weblogs(access_log_path)
+    (countries, visits, timeline), errors = WebLogs.reduce_nginx_weblogs(
+        [CountsReducer('country_name'), VisitsReducer(),
+         TimelineReducer(bins_per_day=2)],
+        filepath=access_log_path, chunksize=100)
+    assert countries.to_dict() == weblogs.country_name.value_counts().to_dict()
+    assert len(visits) == 88
+    assert timeline.sum() == len(weblogs)
+
+    reducer, other_reducer = CountsReducer('IP'), CountsReducer('IP')
+    reducer.update(weblogs[:500])
+    other_reducer.update(weblogs[500:])
+    reducer.merge(other_reducer)
+    assert reducer.result().to_dict() == weblogs.IP.value_counts().to_dict()
+
+
+def test_sketch_reducers():
+    weblogs, _ = WebLogs.from_nginx_weblogs(access_log_path)
+    reducers = [DistinctCountReducer('IP'),
+                DistinctCountReducer('IP', per='country_name'),
+                DistinctCountReducer('IP', bins_per_day=1),
+                TopValuesReducer('IP', capacity=50),
+                QuantilesReducer('status', quantiles=[0, 1])]
+    (n_ips, countries_ips, daily_ips, top_ips, sizes), _ = \
+        WebLogs.reduce_nginx_weblogs(reducers, filepath=access_log_path,
+                                     chunksize=100)
+    assert n_ips == weblogs.IP.nunique() == 88
+    nunique = weblogs.groupby('country_name').IP.nunique()
+    assert countries_ips.to_dict() == nunique.to_dict()
+    assert daily_ips.iloc[0] == 6
+    assert top_ips.index[0] == '181.86.41.10'
+    assert top_ips.iloc[0] == 313
+    assert list(sizes) == [0, weblogs.status.astype(int).max()]
+
+    reducer, other_reducer = (DistinctCountReducer('IP', per='method'),
+                              DistinctCountReducer('IP', per='method'))
+    reducer.update(weblogs[:500])
+    other_reducer.update(weblogs[500:])
+    reducer.merge(other_reducer)
+    nunique = weblogs.groupby('method').IP.nunique()
+    assert reducer.result().to_dict() == nunique.to_dict()
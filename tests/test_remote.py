@@ -0,0 +1,105 @@
+import os
+import pytest
+from lala import WebLogs, get_remote_file_content
+from lala.remote import (local_transport, iter_remote_file_lines,
+                         multiplexed_ssh_transport)
+
+access_log_path = os.path.join('tests', 'data', "test_logs.txt")
+
+
+def test_get_remote_file_content(tmpdir):
+    with open(access_log_path, 'r') as f:
+        content = f.read()
+    for compress in (False, True):
+        remote_content = get_remote_file_content(
+            access_log_path, transport=local_transport, compress=compress)
+        assert remote_content == content
+    assert get_remote_file_content(access_log_path, offset=10,
+                                   transport=local_transport) == content[10:]
+
+    # Resume an interrupted download
+    target = os.path.join(str(tmpdir), 'access.log')
+    with open(target, 'w') as f:
+        f.write(content[:1000])
+    assert get_remote_file_content(
+        access_log_path, target=target, resume=True, compress=True,
+        transport=local_transport, return_content=False) is None
+    with open(target, 'r') as f:
+        assert f.read() == content
+    target = os.path.join(str(tmpdir), 'access_copy.log')
+    assert get_remote_file_content(access_log_path, target=target,
+                                   transport=local_transport) == content
+    with open(target, 'r') as f:
+        assert f.read() == content
+
+
+def test_remote_errors_and_early_stop():
+    try:
+        get_remote_file_content('tests/data/no_such_file.txt',
+                                transport=local_transport)
+        assert False
+    except IOError:
+        pass
+    lines = iter_remote_file_lines(access_log_path, compress=True,
+                                   transport=local_transport)
+    assert len(next(lines)) > 10
+    lines.close()  # stops the transfer without errors
+
+
+def test_from_remote_nginx_weblogs():
+    weblogs, errors = WebLogs.from_nginx_weblogs(access_log_path,
+                                                 geolocation=False)
+    remote_weblogs, remote_errors = WebLogs.from_remote_nginx_weblogs(
+        access_log_path, transport=local_transport, compress=True,
+        chunksize=100, geolocation=False)
+    assert remote_weblogs.equals(weblogs)
+    assert remote_errors == errors
+
+
+def test_from_remote_hosts(tmpdir):
+    with open(access_log_path, 'r') as f:
+        lines = f.read().split('\n')
+    hosts = ['front1', 'front2', 'front3']
+    for i, host in enumerate(hosts):
+        os.mkdir(os.path.join(str(tmpdir), host))
+        with open(os.path.join(str(tmpdir), host, 'access.log'), 'w') as f:
+            f.write('\n'.join(lines[i::3]))
+
+    def fake_transports(host):
+        def transport(command):
+            host_directory = os.path.join(str(tmpdir), host)
+            return ['sh', '-c', 'cd %s && %s' % (host_directory, command)]
+        return transport
+
+    weblogs, errors = WebLogs.from_remote_hosts(
+        hosts, filename='access.log', transports=fake_transports,
+        n_threads=2, geolocation=False)
+    assert sorted(errors) == hosts
+    assert weblogs.host.value_counts().to_dict() == {
+        'front1': 413, 'front2': 413, 'front3': 413}
+    assert weblogs.parsed_date.is_monotonic_increasing
+    all_weblogs, _ = WebLogs.from_nginx_weblogs(access_log_path,
+                                                geolocation=False)
+    assert (weblogs.visitors_and_visits() ==
+            all_weblogs.visitors_and_visits())
+
+
+def test_multiplexed_ssh_transport(tmpdir):
+    control_directory = os.path.join(str(tmpdir), 'ssh')
+    transport = multiplexed_ssh_transport(host='example.com',
+                                          control_directory=control_directory)
+    assert os.stat(control_directory).st_mode & 0o777 == 0o700
+    command = transport('cat access.log')
+    control_path = os.path.join(control_directory, 'lala-ssh-%C')
+    assert 'ControlPath=%s' % control_path in command
+    assert command[-2:] == ['root@example.com', 'cat access.log']
+    # The directory now exists (e.g. created by a parallel call).
+    multiplexed_ssh_transport(control_directory=control_directory)
+
+
+def test_multiplexed_ssh_transport_public_directory(tmpdir):
+    control_directory = os.path.join(str(tmpdir), 'ssh')
+    os.mkdir(control_directory)
+    os.chmod(control_directory, 0o755)
+    with pytest.raises(IOError):
+        multiplexed_ssh_transport(control_directory=control_directory)
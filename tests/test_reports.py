@@ -0,0 +1,49 @@
+import os
+import pytest
+from lala import WebLogs
+
+access_log_path = os.path.join('tests', 'data', "test_logs.txt")
+template = """
+h1 {{ title }}
+p {{ weblogs.index.size }} / {{ total_hits }}
+"""
+
+
+def test_report_to_html():
+    pdf_reports = pytest.importorskip('pdf_reports')
+    from lala.reports import report_to_html, _string_template
+    html = report_to_html(template_string=template, title='Test',
+                          weblogs=[1, 2], total_hits=3)
+    assert html == pdf_reports.pug_to_html(string=template, title='Test',
+                                           weblogs=[1, 2], total_hits=3)
+    n_misses = _string_template.cache_info().misses
+    report_to_html(template_string=template, title='Other',
+                   weblogs=[1, 2], total_hits=3)
+    assert _string_template.cache_info().misses == n_misses
+
+
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_write_reports(tmpdir, n_jobs):
+    pytest.importorskip('pdf_reports')
+    weblogs, _ = WebLogs.from_nginx_weblogs(access_log_path)
+    reports = [
+        dict(target=os.path.join(str(tmpdir), method + '.html'),
+             filters=dict(method=method), context=dict(title=method))
+        for method in ['GET', 'POST']
+    ]
+    reports.append(dict(target=os.path.join(str(tmpdir), 'december.html'),
+                        filters=dict(start='2017-12-05', end='2017-12-07'),
+                        context=dict(title='December')))
+    reports.append(dict(target=os.path.join(str(tmpdir), 'error.html'),
+                        filters=dict(unknown_column='x')))
+    errors = weblogs.write_reports(reports, template_string=template,
+                                   shared_aggregations=dict(total_hits=len),
+                                   n_jobs=n_jobs, logger=None)
+    assert list(errors) == [reports[-1]['target']]
+    with open(reports[0]['target'], 'r') as f:
+        html = f.read()
+    n_get = (weblogs.method == 'GET').sum()
+    assert '<h1>GET</h1>' in html
+    assert '<p>%d / 1239</p>' % n_get in html
+    with open(reports[2]['target'], 'r') as f:
+        assert '<p>309 / 1239</p>' in f.read()
@@ -0,0 +1,54 @@
+import os
+import pytest
+from lala import WebLogs
+from lala.rollups import RollupCube
+
+access_log_path = os.path.join('tests', 'data', "test_logs.txt")
+
+
+def test_rollup_cube():
+    weblogs, _ = WebLogs.from_nginx_weblogs(access_log_path)
+    cube = weblogs.rollup_cube(bucket_duration=3600)
+    assert 'host' not in cube.dimensions
+    assert len(cube.counts) < len(weblogs)
+    assert cube.rollup() == len(weblogs)
+    countries = cube.rollup('country_name')
+    assert countries.to_dict() == weblogs.country_name.value_counts().to_dict()
+    days = cube.rollup(['time'], bucket_duration=24 * 3600)
+    assert days['2017-12-05'].sum() == 131
+
+    period = cube.slice(start='2017-12-05', end='2017-12-07')
+    assert period.rollup() == 309
+    get_200 = cube.slice(response=200, method='GET')
+    assert get_200.rollup() == ((weblogs.response == '200') &
+                                (weblogs.method == 'GET')).sum()
+    with pytest.raises(ValueError):
+        cube.slice(referrer='-')
+
+
+def test_rollup_cube_as_reducer():
+    weblogs, _ = WebLogs.from_nginx_weblogs(access_log_path)
+    cube = weblogs.rollup_cube()
+    (chunked_cube,), _ = WebLogs.reduce_nginx_weblogs(
+        [RollupCube()], filepath=access_log_path, chunksize=100)
+    assert chunked_cube.equals(cube.counts)
+    merged_cube, other_cube = RollupCube(), RollupCube()
+    merged_cube.update(weblogs[:500])
+    other_cube.update(weblogs[500:])
+    merged_cube.merge(other_cube)
+    dimensions = ['time', 'response', 'method']
+    assert merged_cube.rollup(dimensions).equals(cube.rollup(dimensions))
+    with pytest.raises(ValueError):
+        merged_cube.merge(RollupCube(bucket_duration=60))
+
+
+def test_rollup_cube_parquet(tmpdir):
+    pytest.importorskip('pyarrow')
+    weblogs, _ = WebLogs.from_nginx_weblogs(access_log_path)
+    cube = weblogs.rollup_cube(bucket_duration=1800)
+    path = os.path.join(str(tmpdir), 'cube.parquet')
+    cube.to_parquet(path)
+    loaded_cube = RollupCube.from_parquet(path)
+    assert loaded_cube.bucket_duration == 1800
+    assert loaded_cube.dimensions == cube.dimensions
+    assert loaded_cube.counts.equals(cube.counts)
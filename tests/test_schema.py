@@ -0,0 +1,27 @@
+import os
+from lala import WebLogs
+
+access_log_path = os.path.join('tests', 'data', "test_logs.txt")
+
+
+def test_compact():
+    weblogs, _ = WebLogs.from_nginx_weblogs(access_log_path,
+                                            geolocation=False)
+    compact_weblogs = weblogs.compact()
+    assert isinstance(compact_weblogs, WebLogs)
+    assert 'timestamp' not in compact_weblogs.columns
+    assert compact_weblogs.IP.dtype.name == 'category'
+    assert compact_weblogs.response.dtype.name == 'uint16'
+    total = weblogs.memory_usage_report().loc['Total', 'bytes']
+    compact_total = compact_weblogs.memory_usage_report().loc['Total', 'bytes']
+    assert compact_total < total / 4
+
+    assert (compact_weblogs.visitors_and_visits() ==
+            weblogs.visitors_and_visits())
+    assert (compact_weblogs.most_frequent_visitors(n_visitors=5) ==
+            weblogs.most_frequent_visitors(n_visitors=5))
+    for weblogs_ in (weblogs, compact_weblogs):
+        assert len(weblogs_.entries_last(1, 'hour')) == 0
+        assert len(weblogs_.filter_by_text_search(
+            ['Firefox'], are_in='browser')) == 174
+        assert len(weblogs_.blacklist_ips(['181.86.41.10'])) == 926
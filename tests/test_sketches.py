@@ -0,0 +1,49 @@
+import numpy as np
+import pandas
+import pytest
+from lala.sketches import HyperLogLog, SpaceSaving, TDigest
+
+
+def test_hyperloglog():
+    values = np.arange(50000).astype(str)
+    sketch, other_sketch = HyperLogLog(), HyperLogLog()
+    sketch.update(values[:30000])
+    other_sketch.update(np.concatenate([values[20000:], [None, np.nan]]))
+    sketch.merge(other_sketch)
+    assert abs(sketch.count() - 50000) < 0.05 * 50000
+    small_sketch = HyperLogLog()
+    small_sketch.update(['a', 'b', 'a', 'c'])
+    assert small_sketch.count() == 3
+    with pytest.raises(ValueError):
+        sketch.merge(HyperLogLog(precision=10))
+
+
+def test_space_saving():
+    values = np.random.RandomState(0).zipf(1.5, 100000).astype(str)
+    true_counts = pandas.Series(values).value_counts()
+    sketch, other_sketch = SpaceSaving(capacity=100), SpaceSaving(capacity=100)
+    for chunk in np.array_split(values[:50000], 10):
+        sketch.update(chunk)
+    other_sketch.update(values[50000:])
+    sketch.merge(other_sketch)
+    assert len(sketch.counts) == 100
+    top = sketch.top(10)
+    assert list(top.index) == list(true_counts.index[:10])
+    assert (top >= true_counts[top.index]).all()
+    lower_bounds = top - sketch.errors[top.index]
+    assert (lower_bounds <= true_counts[top.index]).all()
+
+
+def test_tdigest():
+    values = np.random.RandomState(0).exponential(1000, 100000)
+    sketch, other_sketch = TDigest(), TDigest()
+    for chunk in np.array_split(values[:50000], 10):
+        sketch.update(chunk)
+    other_sketch.update(values[50000:])
+    sketch.merge(other_sketch)
+    assert len(sketch.means) <= 250
+    quantiles = [0.01, 0.5, 0.9, 0.99]
+    estimates = sketch.quantile(quantiles)
+    assert np.allclose(estimates, np.quantile(values, quantiles), rtol=0.02)
+    assert sketch.quantile(0) == values.min()
+    assert np.isnan(TDigest().quantile(0.5))
@@ -0,0 +1,40 @@
+import os
+import pytest
+from lala import WebLogs
+
+pytest.importorskip('pyarrow')
+
+access_log_path = os.path.join('tests', 'data', "test_logs.txt")
+
+
+def test_to_store_from_store(tmpdir):
+    weblogs, _ = WebLogs.from_nginx_weblogs(access_log_path,
+                                            geolocation=False)
+    store_path = os.path.join(str(tmpdir), 'store')
+    weblogs[:600].to_store(store_path)
+    weblogs[600:].to_store(store_path, append=True)
+    assert sorted(os.listdir(store_path))[0] == '2017-12-01'
+    stored_weblogs = WebLogs.from_store(store_path)
+    assert isinstance(stored_weblogs, WebLogs)
+    assert stored_weblogs.equals(weblogs)
+    assert WebLogs.from_weblogs_spreadsheet(store_path).equals(weblogs)
+
+    selection = WebLogs.from_store(store_path, columns=['IP', 'url'],
+                                   start='2017-12-05', end='2017-12-07')
+    assert list(selection.columns) == ['IP', 'url']
+    assert len(selection) == 309
+
+    # Storing again the entries of some days replaces these days
+    weblogs[weblogs.parsed_date >= '2017-12-05'].to_store(store_path)
+    assert WebLogs.from_store(store_path).equals(weblogs)
+
+
+def test_compact_store(tmpdir):
+    weblogs, _ = WebLogs.from_nginx_weblogs(access_log_path,
+                                            geolocation=False, compact=True)
+    store_path = os.path.join(str(tmpdir), 'store')
+    weblogs.to_store(store_path)
+    stored_weblogs = WebLogs.from_store(store_path)
+    assert stored_weblogs.IP.dtype.name == 'category'
+    assert (stored_weblogs.visitors_and_visits() ==
+            weblogs.visitors_and_visits())
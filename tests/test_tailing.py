@@ -0,0 +1,80 @@
+import os
+import pytest
+from lala import WebLogs
+from lala.reducers import CountsReducer
+from lala.tailing import LogTailer
+
+access_log_path = os.path.join('tests', 'data', "test_logs.txt")
+
+
+def test_log_tailer(tmpdir):
+    with open(access_log_path, 'r') as f:
+        lines = f.read().split('\n')[:300]
+    log_path = os.path.join(str(tmpdir), 'access.log')
+    checkpoint_path = os.path.join(str(tmpdir), 'checkpoints.json')
+
+    def write_lines(path, lines, mode='a'):
+        with open(path, mode) as f:
+            f.write(''.join([line + '\n' for line in lines]))
+
+    write_lines(log_path, lines[:100], mode='w')
+    with open(log_path, 'a') as f:
+        f.write(lines[100][:20])  # a line still being written
+    tailer = LogTailer([log_path], checkpoint_path=checkpoint_path)
+    weblogs, errors = tailer.update(geolocation=False)
+    assert len(weblogs) == 100
+    assert errors == {os.path.abspath(log_path): []}
+
+    # The next update, in a new tailer, only reads the new lines.
+    with open(log_path, 'a') as f:
+        f.write(lines[100][20:] + '\n')
+    write_lines(log_path, lines[101:150])
+    tailer = LogTailer([log_path], checkpoint_path=checkpoint_path)
+    counts = CountsReducer('IP')
+    weblogs, _ = tailer.update(geolocation=False, reducers=[counts])
+    assert len(weblogs) == 50
+    assert weblogs.IP.iloc[0] == lines[100].split(' ')[0]
+    assert tailer.update(geolocation=False)[0].empty
+
+    # Rotation: the end of the rotated file is read, then the new file.
+    write_lines(log_path, lines[150:160])
+    os.rename(log_path, log_path + '.1')
+    write_lines(log_path, lines[160:200], mode='w')
+    weblogs, _ = tailer.update(geolocation=False, reducers=[counts])
+    assert len(weblogs) == 50
+    expected = WebLogs.from_nginx_weblogs(log_lines=lines[100:200],
+                                          geolocation=False)[0]
+    assert counts.result().to_dict() == expected.IP.value_counts().to_dict()
+
+    # Truncation: the file is read from the start.
+    write_lines(log_path, lines[200:210], mode='w')
+    weblogs, _ = tailer.update(geolocation=False)
+    assert len(weblogs) == 10
+
+    # Failed updates: the lines are read again at the next update.
+    class FailingReducer(CountsReducer):
+        def update(self, weblogs):
+            raise IOError('Disk full')
+
+    write_lines(log_path, lines[210:220] + ['not a log line'])
+    with pytest.raises(IOError):
+        tailer.update(geolocation=False, reducers=[FailingReducer('IP')])
+    weblogs, errors = tailer.update(geolocation=False)
+    assert len(weblogs) == 10
+    assert errors == {os.path.abspath(log_path): [10]}
+
+
+def test_log_tailer_store(tmpdir):
+    pytest.importorskip('pyarrow')
+    log_path = os.path.join(str(tmpdir), 'access.log')
+    store_path = os.path.join(str(tmpdir), 'store')
+    with open(access_log_path, 'r') as f:
+        lines = f.read().split('\n')
+    tailer = LogTailer([log_path])
+    for start, end in [(0, 500), (500, 1000), (1000, len(lines))]:
+        with open(log_path, 'a') as f:
+            f.write('\n'.join(lines[start:end]) + '\n')
+        tailer.update(store_path=store_path, geolocation=False)
+    weblogs, _ = WebLogs.from_nginx_weblogs(access_log_path,
+                                            geolocation=False)
+    assert WebLogs.from_store(store_path).equals(weblogs)
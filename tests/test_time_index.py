@@ -0,0 +1,39 @@
+import os
+from lala import WebLogs
+
+access_log_path = os.path.join('tests', 'data', "test_logs.txt")
+
+
+def test_entries_between():
+    weblogs, _ = WebLogs.from_nginx_weblogs(access_log_path,
+                                            geolocation=False)
+    indexed_weblogs, _ = WebLogs.from_nginx_weblogs(
+        access_log_path, geolocation=False, time_index=True)
+    assert indexed_weblogs.has_time_index()
+    assert not weblogs.has_time_index()
+    for start, end in [('2017-12-05', '2017-12-07'), (None, '2017-12-03'),
+                       ('2017-12-09 12:00', None),
+                       ('2017-12-07', '2017-12-05')]:
+        entries = weblogs.entries_between(start, end)
+        indexed_entries = indexed_weblogs.entries_between(start, end)
+        assert len(entries) == len(indexed_entries)
+        assert list(entries.IP) == list(indexed_entries.IP)
+    assert len(weblogs.entries_between('2017-12-05', '2017-12-07')) == 309
+    assert len(indexed_weblogs.entries_last(1, 'hour')) == 0
+    assert len(indexed_weblogs.entries_last(100, 'year')) == len(weblogs)
+    assert (indexed_weblogs.visitors_and_visits() ==
+            weblogs.visitors_and_visits())
+
+
+def test_entries_between_reloaded_spreadsheet(tmpdir):
+    weblogs, _ = WebLogs.from_nginx_weblogs(access_log_path,
+                                            geolocation=False)
+    csv_path = os.path.join(str(tmpdir), 'weblogs.csv')
+    for columns in (weblogs.columns, weblogs.columns.drop('timestamp')):
+        weblogs[columns].to_csv(csv_path, index=False)
+        reloaded = WebLogs.from_weblogs_spreadsheet(csv_path)
+        assert reloaded.parsed_date.dtype == object  # dates as strings
+        assert len(reloaded.entries_last(1, 'hour')) == 0
+        assert len(reloaded.entries_last(100, 'year')) == len(weblogs)
+        entries = reloaded.entries_between('2017-12-05', '2017-12-07')
+        assert len(entries) == 309
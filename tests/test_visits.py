@@ -0,0 +1,131 @@
+import os
+from lala import WebLogs
+
+access_log_path = os.path.join('tests', 'data', "test_logs.txt")
+
+
+def test_sessions():
+    weblogs, _ = WebLogs.from_nginx_weblogs(access_log_path,
+                                            geolocation=False)
+    sessions = weblogs.sessions(max_visits_interval=60)
+    assert list(sessions.columns) == ['visitor', 'start', 'end', 'n_hits',
+                                      'duration']
+    assert sessions.n_hits.sum() == len(weblogs)
+    assert (sessions.end >= sessions.start).all()
+    for visitor, visits in weblogs.visitors_and_visits().items():
+        ip_weblogs = weblogs[weblogs.IP == visitor]
+        assert visits == ip_weblogs.cluster_dates(max_interval=60)
+    log_lines = [
+        '1.2.3.4 - - [01/Dec/2017:12:00:%s +0000] "GET / HTTP/1.1" 200 10 '
+        '"-" "-"' % seconds
+        for seconds in ('00', '45', '10', '01')
+    ]
+    weblogs, _ = WebLogs.from_nginx_weblogs(log_lines=log_lines,
+                                            geolocation=False)
+    sessions = weblogs.sessions(max_visits_interval=30)
+    assert sessions.n_hits.tolist() == [3, 1]
+    assert sessions.duration.tolist() == [10, 0]
+
+
+def test_most_frequent_visitors():
+    weblogs, _ = WebLogs.from_nginx_weblogs(access_log_path,
+                                            geolocation=False)
+    visitors = weblogs.most_frequent_visitors(n_visitors=5)
+    assert len(visitors) == 5
+    assert visitors[0] == (20, '181.86.41.10')
+    time_spent = weblogs.most_frequent_visitors(criterion='time_spent')
+    assert [score for score, _ in time_spent] == sorted(
+        [score for score, _ in time_spent], reverse=True)
+    assert len(time_spent) == 88
+
+
+def test_most_frequent_visitors_several_criteria():
+    weblogs, _ = WebLogs.from_nginx_weblogs(access_log_path,
+                                            geolocation=False)
+    criteria = ['n_visits', 'time_spent']
+    top_visitors = weblogs.most_frequent_visitors(criteria, n_visitors=10)
+    for criterion in criteria:
+        all_visitors = weblogs.most_frequent_visitors(criterion)
+        assert top_visitors[criterion] == all_visitors[:10]
+
+
+def test_memoized_aggregations():
+    weblogs, _ = WebLogs.from_nginx_weblogs(access_log_path,
+                                            geolocation=False)
+    visits = weblogs.visitors_and_visits()
+    assert weblogs.visitors_and_visits(max_visits_interval=60) is visits
+    assert weblogs.cache_info() == (1, 2, 2)  # sessions, visitors_and_visits
+    assert weblogs.most_frequent_visitors(n_visitors=5)[0] == (
+        20, '181.86.41.10')
+    assert weblogs.cache_info() == (2, 3, 3)  # reused the sessions
+
+    # Derived weblogs have their own cache
+    filtered = weblogs[weblogs.IP != '181.86.41.10']
+    assert filtered.cache_info() == (0, 0, 0)
+    assert '181.86.41.10' not in filtered.visitors_and_visits()
+
+    # Modifications of the weblogs empty the cache
+    weblogs['domain'] = 'Unknown'
+    assert weblogs.cache_info().currsize == 0
+    weblogs.visitors_and_visits()
+    weblogs.drop(weblogs.index[:10], inplace=True)
+    assert weblogs.visitors_and_visits() is not visits
+    assert weblogs.cache_info() == (2, 7, 2)
+
+    # The figures are drawn again, from the cached counts
+    ax1, counts1 = weblogs.plot_piechart('response')
+    ax2, counts2 = weblogs.plot_piechart('response')
+    assert ax1 is not ax2
+    assert counts1 is counts2
+
+
+def test_memoized_aggregations_invalidation():
+    log_lines = [
+        '%s - - [01/Dec/2017:12:00:%s +0000] "GET / HTTP/1.1" 200 10 '
+        '"-" "-"' % (ip, seconds)
+        for ip, seconds in [('1.1.1.1', '00'), ('1.1.1.1', '10'),
+                            ('2.2.2.2', '20'), ('2.2.2.2', '30')]
+    ]
+    weblogs, _ = WebLogs.from_nginx_weblogs(log_lines=log_lines,
+                                            geolocation=False)
+    ip_column = list(weblogs.columns).index('IP')
+
+    def visitors():
+        return sorted(weblogs.visitors_and_visits())
+
+    def check_cache_emptied():
+        assert weblogs.cache_info().currsize == 0
+        assert visitors() == sorted(set(weblogs.IP))
+        assert sorted(v for _, v in weblogs.most_frequent_visitors()) == (
+            sorted(set(weblogs.IP)))
+
+    # Derived weblogs don't empty the cache
+    visitors()
+    weblogs.copy()
+    weblogs[weblogs.IP == '1.1.1.1'].visitors_and_visits()
+    weblogs.sort_values('IP')
+    assert weblogs.cache_info().currsize == 2
+
+    weblogs.replace({'IP': {'1.1.1.1': '3.3.3.3'}}, inplace=True)
+    check_cache_emptied()
+    weblogs.iloc[0, ip_column] = '4.4.4.4'
+    check_cache_emptied()
+    weblogs.loc[weblogs.index[1], 'IP'] = '5.5.5.5'
+    check_cache_emptied()
+    weblogs.at[weblogs.index[2], 'IP'] = '6.6.6.6'
+    check_cache_emptied()
+    weblogs.drop(weblogs.index[3], inplace=True)
+    check_cache_emptied()
+    assert visitors() == ['4.4.4.4', '5.5.5.5', '6.6.6.6']
+
+
+def test_visitors_locations():
+    weblogs = WebLogs({
+        'IP': ['1.1.1.1', '2.2.2.2', '1.1.1.1', '3.3.3.3', None],
+        'city': ['Lima', float('nan'), 'Paris', float('nan'), 'Rome'],
+        'country_name': ['Peru', 'France', 'France', float('nan'), 'Italy'],
+    })
+    expected = {'1.1.1.1': 'Lima Peru', '2.2.2.2': ' France',
+                '3.3.3.3': ' '}
+    assert weblogs.visitors_locations() == expected
+    assert weblogs.compact().visitors_locations() == expected